@@ -0,0 +1,10 @@
+# lextab.py. This file automatically created by PLY (version 3.4). Don't edit!
+_tabversion   = '3.4'
+_lextokens    = {'OVER': 1, 'NUMBER': 1, 'ENTITY': 1, 'COMMENT': 1, 'BLOCK_OPEN': 1, 'COMMA': 1, 'LEFT': 1, 'ACTIVATE': 1, 'STRING': 1, 'BLOCK_CLOSE': 1, 'ELSE': 1, 'AS': 1, 'DESTROY': 1, 'MESSAGE_TYPE': 1, 'DECLARE': 1, 'WAIT': 1, 'OPT': 1, 'RIGHT': 1, 'DEACTIVATE': 1, 'OF': 1, 'NOTE': 1, 'ALT': 1, 'LOOP': 1}
+_lexreflags   = 0
+_lexliterals  = ''
+_lexstateinfo = {'INITIAL': 'inclusive'}
+_lexstatere   = {'INITIAL': [('(?P<t_ENTITY>[a-zA-Z_][a-zA-Z0-9_]*)|(?P<t_NUMBER>\\d+)|(?P<t_COMMENT>\\#.*)|(?P<t_MESSAGE_TYPE>([-~]>|<-))|(?P<t_STRING>"(\\\\"|[^"])*"({\\d+})?)|(?P<t_newline>\\n+)|(?P<t_DEACTIVATE>deactivate)|(?P<t_ACTIVATE>activate)|(?P<t_DECLARE>declare)|(?P<t_DESTROY>destroy)|(?P<t_RIGHT>right)|(?P<t_NOTE>note)|(?P<t_ELSE>else)|(?P<t_OVER>over)|(?P<t_WAIT>wait)|(?P<t_LOOP>loop)|(?P<t_LEFT>left)|(?P<t_ALT>alt)|(?P<t_OPT>opt)|(?P<t_AS>as)|(?P<t_OF>of)|(?P<t_COMMA>,)|(?P<t_BLOCK_CLOSE>})|(?P<t_BLOCK_OPEN>{)', [None, ('t_ENTITY', 'ENTITY'), ('t_NUMBER', 'NUMBER'), ('t_COMMENT', 'COMMENT'), ('t_MESSAGE_TYPE', 'MESSAGE_TYPE'), None, ('t_STRING', 'STRING'), None, None, ('t_newline', 'newline'), (None, 'DEACTIVATE'), (None, 'ACTIVATE'), (None, 'DECLARE'), (None, 'DESTROY'), (None, 'RIGHT'), (None, 'NOTE'), (None, 'ELSE'), (None, 'OVER'), (None, 'WAIT'), (None, 'LOOP'), (None, 'LEFT'), (None, 'ALT'), (None, 'OPT'), (None, 'AS'), (None, 'OF'), (None, 'COMMA'), (None, 'BLOCK_CLOSE'), (None, 'BLOCK_OPEN')])]}
+_lexstateignore = {'INITIAL': ' \t'}
+_lexstateerrorf = {'INITIAL': 't_error'}
+_lexsignature = '76adc27bbcc343987e945d906edebb62'
@@ -5,9 +5,9 @@ _tabversion = '3.2'
 
 _lr_method = 'LALR'
 
-_lr_signature = '}\xae\x10(\xf7\x93[\x8fp\xbd\xfd\x19a\xb7\xecq'
+_lr_signature = '\xf0`\xa3\x1e\xf5\xc6q\xa6t\xd2H\x18\x99\x7f\xda\xc8'
     
-_lr_action_items = {'OVER':([19,],[37,]),'NUMBER':([11,22,],[27,41,]),'ENTITY':([0,1,2,4,5,6,7,8,9,10,11,12,13,14,15,16,18,21,23,24,26,27,28,29,30,32,34,35,37,44,45,46,47,48,49,51,52,53,54,55,56,57,58,59,60,61,62,64,66,67,68,69,],[3,-7,3,-5,-3,-4,-8,-10,3,-9,-13,-6,29,30,32,-12,35,-11,-2,42,-1,-14,-27,-26,-32,-15,-31,-30,50,57,58,59,3,-21,63,65,-18,-19,-20,-25,-17,-29,-28,-16,3,3,-24,-33,-22,-23,-35,-34,]),'BLOCK_OPEN':([33,39,40,41,43,],[47,47,47,47,47,]),'COMMA':([28,29,34,35,57,58,],[44,45,44,45,-29,-28,]),'LEFT':([19,],[38,]),'ACTIVATE':([0,1,2,4,5,6,7,8,9,10,11,12,16,21,23,26,27,28,29,30,32,34,35,47,48,52,53,54,55,56,57,58,59,60,61,62,64,66,67,68,69,],[13,-7,13,-5,-3,-4,-8,-10,13,-9,-13,-6,-12,-11,-2,-1,-14,-27,-26,-32,-15,-31,-30,13,-21,-18,-19,-20,-25,-17,-29,-28,-16,13,13,-24,-33,-22,-23,-35,-34,]),'STRING':([15,17,20,22,25,42,50,63,65,],[31,33,39,40,43,55,64,68,69,]),'BLOCK_CLOSE':([1,4,5,6,7,8,10,11,12,16,21,23,26,27,28,29,30,32,34,35,47,48,52,53,54,55,56,57,58,59,60,61,62,64,66,67,68,69,],[-7,-5,-3,-4,-8,-10,-9,-13,-6,-12,-11,-2,-1,-14,-27,-26,-32,-15,-31,-30,62,-21,-18,-19,-20,-25,-17,-29,-28,-16,66,67,-24,-33,-22,-23,-35,-34,]),'ELSE':([6,52,56,62,66,67,],[25,-18,-17,-24,-22,-23,]),'AS':([31,],[46,]),'DESTROY':([0,1,2,4,5,6,7,8,9,10,11,12,16,21,23,26,27,28,29,30,32,34,35,47,48,52,53,54,55,56,57,58,59,60,61,62,64,66,67,68,69,],[14,-7,14,-5,-3,-4,-8,-10,14,-9,-13,-6,-12,-11,-2,-1,-14,-27,-26,-32,-15,-31,-30,14,-21,-18,-19,-20,-25,-17,-29,-28,-16,14,14,-24,-33,-22,-23,-35,-34,]),'MESSAGE_TYPE':([3,],[24,]),'DECLARE':([0,1,2,4,5,6,7,8,9,10,11,12,16,21,23,26,27,28,29,30,32,34,35,47,48,52,53,54,55,56,57,58,59,60,61,62,64,66,67,68,69,],[15,-7,15,-5,-3,-4,-8,-10,15,-9,-13,-6,-12,-11,-2,-1,-14,-27,-26,-32,-15,-31,-30,15,-21,-18,-19,-20,-25,-17,-29,-28,-16,15,15,-24,-33,-22,-23,-35,-34,]),'WAIT':([0,1,2,4,5,6,7,8,9,10,11,12,16,21,23,26,27,28,29,30,32,34,35,47,48,52,53,54,55,56,57,58,59,60,61,62,64,66,67,68,69,],[11,-7,11,-5,-3,-4,-8,-10,11,-9,-13,-6,-12,-11,-2,-1,-14,-27,-26,-32,-15,-31,-30,11,-21,-18,-19,-20,-25,-17,-29,-28,-16,11,11,-24,-33,-22,-23,-35,-34,]),'OPT':([0,1,2,4,5,6,7,8,9,10,11,12,16,21,23,26,27,28,29,30,32,34,35,47,48,52,53,54,55,56,57,58,59,60,61,62,64,66,67,68,69,],[17,-7,17,-5,-3,-4,-8,-10,17,-9,-13,-6,-12,-11,-2,-1,-14,-27,-26,-32,-15,-31,-30,17,-21,-18,-19,-20,-25,-17,-29,-28,-16,17,17,-24,-33,-22,-23,-35,-34,]),'RIGHT':([19,],[36,]),'DEACTIVATE':([0,1,2,4,5,6,7,8,9,10,11,12,16,21,23,26,27,28,29,30,32,34,35,47,48,52,53,54,55,56,57,58,59,60,61,62,64,66,67,68,69,],[18,-7,18,-5,-3,-4,-8,-10,18,-9,-13,-6,-12,-11,-2,-1,-14,-27,-26,-32,-15,-31,-30,18,-21,-18,-19,-20,-25,-17,-29,-28,-16,18,18,-24,-33,-22,-23,-35,-34,]),'OF':([36,38,],[49,51,]),'NOTE':([0,1,2,4,5,6,7,8,9,10,11,12,16,21,23,26,27,28,29,30,32,34,35,47,48,52,53,54,55,56,57,58,59,60,61,62,64,66,67,68,69,],[19,-7,19,-5,-3,-4,-8,-10,19,-9,-13,-6,-12,-11,-2,-1,-14,-27,-26,-32,-15,-31,-30,19,-21,-18,-19,-20,-25,-17,-29,-28,-16,19,19,-24,-33,-22,-23,-35,-34,]),'ALT':([0,1,2,4,5,6,7,8,9,10,11,12,16,21,23,26,27,28,29,30,32,34,35,47,48,52,53,54,55,56,57,58,59,60,61,62,64,66,67,68,69,],[20,-7,20,-5,-3,-4,-8,-10,20,-9,-13,-6,-12,-11,-2,-1,-14,-27,-26,-32,-15,-31,-30,20,-21,-18,-19,-20,-25,-17,-29,-28,-16,20,20,-24,-33,-22,-23,-35,-34,]),'$end':([1,2,4,5,6,7,8,10,11,12,16,21,23,26,27,28,29,30,32,34,35,48,52,53,54,55,56,57,58,59,62,64,66,67,68,69,],[-7,0,-5,-3,-4,-8,-10,-9,-13,-6,-12,-11,-2,-1,-14,-27,-26,-32,-15,-31,-30,-21,-18,-19,-20,-25,-17,-29,-28,-16,-24,-33,-22,-23,-35,-34,]),'LOOP':([0,1,2,4,5,6,7,8,9,10,11,12,16,21,23,26,27,28,29,30,32,34,35,47,48,52,53,54,55,56,57,58,59,60,61,62,64,66,67,68,69,],[22,-7,22,-5,-3,-4,-8,-10,22,-9,-13,-6,-12,-11,-2,-1,-14,-27,-26,-32,-15,-31,-30,22,-21,-18,-19,-20,-25,-17,-29,-28,-16,22,22,-24,-33,-22,-23,-35,-34,]),}
+_lr_action_items = {'OVER':([19,],[36,]),'NUMBER':([11,22,],[26,40,]),'ENTITY':([0,1,3,4,5,6,7,8,9,10,11,12,13,14,15,16,18,21,23,25,26,27,28,29,31,33,34,36,43,44,45,46,47,48,50,51,52,53,54,55,56,57,58,59,60,61,63,65,66,67,68,69,70,],[2,-9,-7,-5,-6,-10,-12,2,-1,-11,-15,-8,28,29,31,-14,34,-13,41,-2,-16,-29,-28,-34,-17,-33,-32,49,56,57,58,2,-23,62,64,-20,-21,-22,-27,-19,-31,-30,-18,2,2,-26,-35,-4,-24,-3,-25,-37,-36,]),'BLOCK_OPEN':([32,38,39,40,42,],[46,46,46,46,46,]),'COMMA':([27,28,33,34,56,57,],[43,44,43,44,-31,-30,]),'LEFT':([19,],[37,]),'ACTIVATE':([0,1,3,4,5,6,7,8,9,10,11,12,16,21,25,26,27,28,29,31,33,34,46,47,51,52,53,54,55,56,57,58,59,60,61,63,65,66,67,68,69,70,],[13,-9,-7,-5,-6,-10,-12,13,-1,-11,-15,-8,-14,-13,-2,-16,-29,-28,-34,-17,-33,-32,13,-23,-20,-21,-22,-27,-19,-31,-30,-18,13,13,-26,-35,-4,-24,-3,-25,-37,-36,]),'STRING':([15,17,20,22,24,41,49,62,64,],[30,32,38,39,42,54,63,69,70,]),'BLOCK_CLOSE':([1,3,4,5,6,7,10,11,12,16,21,26,27,28,29,31,33,34,46,47,51,52,53,54,55,56,57,58,59,60,61,63,65,66,67,68,69,70,],[-9,-7,-5,-6,-10,-12,-11,-15,-8,-14,-13,-16,-29,-28,-34,-17,-33,-32,61,-23,-20,-21,-22,-27,-19,-31,-30,-18,66,68,-26,-35,-4,-24,-3,-25,-37,-36,]),'ELSE':([5,51,55,61,66,68,],[24,-20,-19,-26,-24,-25,]),'AS':([30,],[45,]),'DESTROY':([0,1,3,4,5,6,7,8,9,10,11,12,16,21,25,26,27,28,29,31,33,34,46,47,51,52,53,54,55,56,57,58,59,60,61,63,65,66,67,68,69,70,],[14,-9,-7,-5,-6,-10,-12,14,-1,-11,-15,-8,-14,-13,-2,-16,-29,-28,-34,-17,-33,-32,14,-23,-20,-21,-22,-27,-19,-31,-30,-18,14,14,-26,-35,-4,-24,-3,-25,-37,-36,]),'MESSAGE_TYPE':([2,],[23,]),'DECLARE':([0,1,3,4,5,6,7,8,9,10,11,12,16,21,25,26,27,28,29,31,33,34,46,47,51,52,53,54,55,56,57,58,59,60,61,63,65,66,67,68,69,70,],[15,-9,-7,-5,-6,-10,-12,15,-1,-11,-15,-8,-14,-13,-2,-16,-29,-28,-34,-17,-33,-32,15,-23,-20,-21,-22,-27,-19,-31,-30,-18,15,15,-26,-35,-4,-24,-3,-25,-37,-36,]),'WAIT':([0,1,3,4,5,6,7,8,9,10,11,12,16,21,25,26,27,28,29,31,33,34,46,47,51,52,53,54,55,56,57,58,59,60,61,63,65,66,67,68,69,70,],[11,-9,-7,-5,-6,-10,-12,11,-1,-11,-15,-8,-14,-13,-2,-16,-29,-28,-34,-17,-33,-32,11,-23,-20,-21,-22,-27,-19,-31,-30,-18,11,11,-26,-35,-4,-24,-3,-25,-37,-36,]),'OPT':([0,1,3,4,5,6,7,8,9,10,11,12,16,21,25,26,27,28,29,31,33,34,46,47,51,52,53,54,55,56,57,58,59,60,61,63,65,66,67,68,69,70,],[17,-9,-7,-5,-6,-10,-12,17,-1,-11,-15,-8,-14,-13,-2,-16,-29,-28,-34,-17,-33,-32,17,-23,-20,-21,-22,-27,-19,-31,-30,-18,17,17,-26,-35,-4,-24,-3,-25,-37,-36,]),'RIGHT':([19,],[35,]),'DEACTIVATE':([0,1,3,4,5,6,7,8,9,10,11,12,16,21,25,26,27,28,29,31,33,34,46,47,51,52,53,54,55,56,57,58,59,60,61,63,65,66,67,68,69,70,],[18,-9,-7,-5,-6,-10,-12,18,-1,-11,-15,-8,-14,-13,-2,-16,-29,-28,-34,-17,-33,-32,18,-23,-20,-21,-22,-27,-19,-31,-30,-18,18,18,-26,-35,-4,-24,-3,-25,-37,-36,]),'OF':([35,37,],[48,50,]),'NOTE':([0,1,3,4,5,6,7,8,9,10,11,12,16,21,25,26,27,28,29,31,33,34,46,47,51,52,53,54,55,56,57,58,59,60,61,63,65,66,67,68,69,70,],[19,-9,-7,-5,-6,-10,-12,19,-1,-11,-15,-8,-14,-13,-2,-16,-29,-28,-34,-17,-33,-32,19,-23,-20,-21,-22,-27,-19,-31,-30,-18,19,19,-26,-35,-4,-24,-3,-25,-37,-36,]),'ALT':([0,1,3,4,5,6,7,8,9,10,11,12,16,21,25,26,27,28,29,31,33,34,46,47,51,52,53,54,55,56,57,58,59,60,61,63,65,66,67,68,69,70,],[20,-9,-7,-5,-6,-10,-12,20,-1,-11,-15,-8,-14,-13,-2,-16,-29,-28,-34,-17,-33,-32,20,-23,-20,-21,-22,-27,-19,-31,-30,-18,20,20,-26,-35,-4,-24,-3,-25,-37,-36,]),'$end':([1,3,4,5,6,7,8,9,10,11,12,16,21,25,26,27,28,29,31,33,34,47,51,52,53,54,55,56,57,58,61,63,66,68,69,70,],[-9,-7,-5,-6,-10,-12,0,-1,-11,-15,-8,-14,-13,-2,-16,-29,-28,-34,-17,-33,-32,-23,-20,-21,-22,-27,-19,-31,-30,-18,-26,-35,-24,-25,-37,-36,]),'LOOP':([0,1,3,4,5,6,7,8,9,10,11,12,16,21,25,26,27,28,29,31,33,34,46,47,51,52,53,54,55,56,57,58,59,60,61,63,65,66,67,68,69,70,],[22,-9,-7,-5,-6,-10,-12,22,-1,-11,-15,-8,-14,-13,-2,-16,-29,-28,-34,-17,-33,-32,22,-23,-20,-21,-22,-27,-19,-31,-30,-18,22,22,-26,-35,-4,-24,-3,-25,-37,-36,]),}
 
 _lr_action = { }
 for _k, _v in _lr_action_items.items():
@@ -16,7 +16,7 @@ for _k, _v in _lr_action_items.items():
       _lr_action[_x][_k] = _y
 del _lr_action_items
 
-_lr_goto_items = {'opt':([0,2,9,47,60,61,],[12,12,12,12,12,12,]),'activate':([0,2,9,47,60,61,],[1,1,1,1,1,1,]),'sequence':([0,47,],[2,60,]),'deactivate':([0,2,9,47,60,61,],[7,7,7,7,7,7,]),'entity_list':([13,18,],[28,34,]),'declare':([0,2,9,47,60,61,],[21,21,21,21,21,21,]),'note':([0,2,9,47,60,61,],[8,8,8,8,8,8,]),'block':([33,39,40,41,43,],[48,52,53,54,56,]),'statement':([0,2,9,47,60,61,],[9,23,26,61,23,26,]),'destroy':([0,2,9,47,60,61,],[10,10,10,10,10,10,]),'alt':([0,2,9,47,60,61,],[6,6,6,6,6,6,]),'message':([0,2,9,47,60,61,],[5,5,5,5,5,5,]),'loop':([0,2,9,47,60,61,],[4,4,4,4,4,4,]),'wait':([0,2,9,47,60,61,],[16,16,16,16,16,16,]),}
+_lr_goto_items = {'opt':([0,8,46,59,60,],[12,12,12,12,12,]),'activate':([0,8,46,59,60,],[1,1,1,1,1,]),'entity_list':([13,18,],[27,33,]),'deactivate':([0,8,46,59,60,],[6,6,6,6,6,]),'sequence':([46,],[59,]),'declare':([0,8,46,59,60,],[21,21,21,21,21,]),'note':([0,8,46,59,60,],[7,7,7,7,7,]),'program':([0,],[8,]),'block':([32,38,39,40,42,],[47,51,52,53,55,]),'statement':([0,8,46,59,60,],[9,25,60,65,67,]),'destroy':([0,8,46,59,60,],[10,10,10,10,10,]),'alt':([0,8,46,59,60,],[5,5,5,5,5,]),'message':([0,8,46,59,60,],[4,4,4,4,4,]),'loop':([0,8,46,59,60,],[3,3,3,3,3,]),'wait':([0,8,46,59,60,],[16,16,16,16,16,]),}
 
 _lr_goto = { }
 for _k, _v in _lr_goto_items.items():
@@ -25,40 +25,42 @@ for _k, _v in _lr_goto_items.items():
        _lr_goto[_x][_k] = _y
 del _lr_goto_items
 _lr_productions = [
-  ("S' -> sequence","S'",1,None,None,None),
-  ('sequence -> statement statement','sequence',2,'p_sequence','/home/smizrahi/projects/sege/segeParser.py',217),
-  ('sequence -> sequence statement','sequence',2,'p_sequence','/home/smizrahi/projects/sege/segeParser.py',218),
-  ('statement -> message','statement',1,'p_statement','/home/smizrahi/projects/sege/segeParser.py',225),
-  ('statement -> alt','statement',1,'p_statement','/home/smizrahi/projects/sege/segeParser.py',226),
-  ('statement -> loop','statement',1,'p_statement','/home/smizrahi/projects/sege/segeParser.py',227),
-  ('statement -> opt','statement',1,'p_statement','/home/smizrahi/projects/sege/segeParser.py',228),
-  ('statement -> activate','statement',1,'p_statement','/home/smizrahi/projects/sege/segeParser.py',229),
-  ('statement -> deactivate','statement',1,'p_statement','/home/smizrahi/projects/sege/segeParser.py',230),
-  ('statement -> destroy','statement',1,'p_statement','/home/smizrahi/projects/sege/segeParser.py',231),
-  ('statement -> note','statement',1,'p_statement','/home/smizrahi/projects/sege/segeParser.py',232),
-  ('statement -> declare','statement',1,'p_statement','/home/smizrahi/projects/sege/segeParser.py',233),
-  ('statement -> wait','statement',1,'p_statement','/home/smizrahi/projects/sege/segeParser.py',234),
-  ('wait -> WAIT','wait',1,'p_wait','/home/smizrahi/projects/sege/segeParser.py',240),
-  ('wait -> WAIT NUMBER','wait',2,'p_wait_n','/home/smizrahi/projects/sege/segeParser.py',244),
-  ('declare -> DECLARE ENTITY','declare',2,'p_declare_simple','/home/smizrahi/projects/sege/segeParser.py',250),
-  ('declare -> DECLARE STRING AS ENTITY','declare',4,'p_declare_complex','/home/smizrahi/projects/sege/segeParser.py',254),
-  ('alt -> alt ELSE STRING block','alt',4,'p_else','/home/smizrahi/projects/sege/segeParser.py',258),
-  ('alt -> ALT STRING block','alt',3,'p_alt','/home/smizrahi/projects/sege/segeParser.py',263),
-  ('loop -> LOOP STRING block','loop',3,'p_loop','/home/smizrahi/projects/sege/segeParser.py',268),
-  ('loop -> LOOP NUMBER block','loop',3,'p_loop','/home/smizrahi/projects/sege/segeParser.py',269),
-  ('opt -> OPT STRING block','opt',3,'p_opt','/home/smizrahi/projects/sege/segeParser.py',274),
-  ('block -> BLOCK_OPEN sequence BLOCK_CLOSE','block',3,'p_block','/home/smizrahi/projects/sege/segeParser.py',279),
-  ('block -> BLOCK_OPEN statement BLOCK_CLOSE','block',3,'p_block','/home/smizrahi/projects/sege/segeParser.py',280),
-  ('block -> BLOCK_OPEN BLOCK_CLOSE','block',2,'p_empty_block','/home/smizrahi/projects/sege/segeParser.py',286),
-  ('message -> ENTITY MESSAGE_TYPE ENTITY STRING','message',4,'p_message','/home/smizrahi/projects/sege/segeParser.py',292),
-  ('activate -> ACTIVATE ENTITY','activate',2,'p_activate','/home/smizrahi/projects/sege/segeParser.py',307),
-  ('activate -> ACTIVATE entity_list','activate',2,'p_activate_list','/home/smizrahi/projects/sege/segeParser.py',311),
-  ('entity_list -> ENTITY COMMA ENTITY','entity_list',3,'p_entity_list','/home/smizrahi/projects/sege/segeParser.py',315),
-  ('entity_list -> entity_list COMMA ENTITY','entity_list',3,'p_entity_list_extend','/home/smizrahi/projects/sege/segeParser.py',319),
-  ('deactivate -> DEACTIVATE ENTITY','deactivate',2,'p_deactivate','/home/smizrahi/projects/sege/segeParser.py',324),
-  ('deactivate -> DEACTIVATE entity_list','deactivate',2,'p_deactivate_list','/home/smizrahi/projects/sege/segeParser.py',328),
-  ('destroy -> DESTROY ENTITY','destroy',2,'p_destroy','/home/smizrahi/projects/sege/segeParser.py',332),
-  ('note -> NOTE OVER ENTITY STRING','note',4,'p_note','/home/smizrahi/projects/sege/segeParser.py',337),
-  ('note -> NOTE LEFT OF ENTITY STRING','note',5,'p_note','/home/smizrahi/projects/sege/segeParser.py',338),
-  ('note -> NOTE RIGHT OF ENTITY STRING','note',5,'p_note','/home/smizrahi/projects/sege/segeParser.py',339),
+  ("S' -> program","S'",1,None,None,None),
+  ('program -> statement','program',1,'p_program','segeParser.py',283),
+  ('program -> program statement','program',2,'p_program','segeParser.py',284),
+  ('sequence -> statement statement','sequence',2,'p_sequence','segeParser.py',295),
+  ('sequence -> sequence statement','sequence',2,'p_sequence_extend','segeParser.py',303),
+  ('statement -> message','statement',1,'p_statement','segeParser.py',311),
+  ('statement -> alt','statement',1,'p_statement','segeParser.py',312),
+  ('statement -> loop','statement',1,'p_statement','segeParser.py',313),
+  ('statement -> opt','statement',1,'p_statement','segeParser.py',314),
+  ('statement -> activate','statement',1,'p_statement','segeParser.py',315),
+  ('statement -> deactivate','statement',1,'p_statement','segeParser.py',316),
+  ('statement -> destroy','statement',1,'p_statement','segeParser.py',317),
+  ('statement -> note','statement',1,'p_statement','segeParser.py',318),
+  ('statement -> declare','statement',1,'p_statement','segeParser.py',319),
+  ('statement -> wait','statement',1,'p_statement','segeParser.py',320),
+  ('wait -> WAIT','wait',1,'p_wait','segeParser.py',326),
+  ('wait -> WAIT NUMBER','wait',2,'p_wait_n','segeParser.py',330),
+  ('declare -> DECLARE ENTITY','declare',2,'p_declare_simple','segeParser.py',336),
+  ('declare -> DECLARE STRING AS ENTITY','declare',4,'p_declare_complex','segeParser.py',340),
+  ('alt -> alt ELSE STRING block','alt',4,'p_else','segeParser.py',344),
+  ('alt -> ALT STRING block','alt',3,'p_alt','segeParser.py',349),
+  ('loop -> LOOP STRING block','loop',3,'p_loop','segeParser.py',354),
+  ('loop -> LOOP NUMBER block','loop',3,'p_loop','segeParser.py',355),
+  ('opt -> OPT STRING block','opt',3,'p_opt','segeParser.py',360),
+  ('block -> BLOCK_OPEN sequence BLOCK_CLOSE','block',3,'p_block','segeParser.py',364),
+  ('block -> BLOCK_OPEN statement BLOCK_CLOSE','block',3,'p_block_statement','segeParser.py',368),
+  ('block -> BLOCK_OPEN BLOCK_CLOSE','block',2,'p_empty_block','segeParser.py',372),
+  ('message -> ENTITY MESSAGE_TYPE ENTITY STRING','message',4,'p_message','segeParser.py',378),
+  ('activate -> ACTIVATE ENTITY','activate',2,'p_activate','segeParser.py',393),
+  ('activate -> ACTIVATE entity_list','activate',2,'p_activate_list','segeParser.py',397),
+  ('entity_list -> ENTITY COMMA ENTITY','entity_list',3,'p_entity_list','segeParser.py',401),
+  ('entity_list -> entity_list COMMA ENTITY','entity_list',3,'p_entity_list_extend','segeParser.py',405),
+  ('deactivate -> DEACTIVATE ENTITY','deactivate',2,'p_deactivate','segeParser.py',410),
+  ('deactivate -> DEACTIVATE entity_list','deactivate',2,'p_deactivate_list','segeParser.py',414),
+  ('destroy -> DESTROY ENTITY','destroy',2,'p_destroy','segeParser.py',418),
+  ('note -> NOTE OVER ENTITY STRING','note',4,'p_note','segeParser.py',423),
+  ('note -> NOTE LEFT OF ENTITY STRING','note',5,'p_note','segeParser.py',424),
+  ('note -> NOTE RIGHT OF ENTITY STRING','note',5,'p_note','segeParser.py',425),
 ]
@@ -1,24 +1,282 @@
 #! /usr/bin/env python
 import argparse
+import cProfile
+import glob
+import multiprocessing
+import os
 import sys
+import time
 
+import segeCache
 import segeCompiler
+import segeParser
+import segeProfile
+import segeServer
 
-def generate(fname, options):
+# Used for --output when compiling more than one file
+BATCH_OUTPUT = "{dir}/{name}.{format}"
+# Resolution of a diagram drawn at scale 1, for --dpi
+BASE_DPI = 96.0
 
-    target = segeCompiler.compileSource(fname)
-    with open(options.output, "wb") as f:
-        target.write_to_png(f)
-    target.finish()
+def expandInputs(args):
+    files = []
+    for arg in args:
+        if os.path.isdir(arg):
+            for root, dirs, names in os.walk(arg):
+                dirs.sort()
+                files.extend(os.path.join(root, name)
+                             for name in sorted(names)
+                             if name.endswith(".sege"))
+        elif glob.has_magic(arg):
+            files.extend(sorted(glob.glob(arg)))
+        else:
+            files.append(arg)
+
+    return files
+
+def outputName(fname, template, fmt):
+    dirname, basename = os.path.split(fname)
+    return template.format(dir=dirname or ".",
+                           name=os.path.splitext(basename)[0],
+                           format=fmt)
+
+def makeCache(options):
+    if options.cacheDir is None:
+        return None
+
+    return segeCache.RenderCache(options.cacheDir,
+                                 options.cacheSize * 1024 * 1024)
+
+# FORMAT[@SCALE]=OUT
+def outputSpec(text):
+    try:
+        fmt, template = text.split("=", 1)
+        scale = 1.0
+        if "@" in fmt:
+            fmt, scale = fmt.split("@", 1)
+            scale = float(scale)
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected FORMAT[@SCALE]=OUT, "
+                                         "got '%s'" % text)
+
+    if fmt not in segeCompiler.FORMATS:
+        raise argparse.ArgumentTypeError("unknown format '%s'" % fmt)
+
+    return fmt, scale, template
+
+def generate(fname, options, cache=None, profile=None):
+    specs = options.emit or [(options.format, options.scale,
+                              options.output or "res.%s" % options.format)]
+    outputs = [(fmt, scale, outputName(fname, template, fmt))
+               for fmt, scale, template in specs]
+    segeCompiler.compileOutputs(fname, outputs, options.style, cache=cache,
+                                stripHeight=options.stripHeight,
+                                profile=profile)
+    return ", ".join(output for fmt, scale, output in outputs)
+
+_worker = {}
+
+def _initWorker(options):
+    # Pay for the parser tables and style lookups once per worker
+    segeParser.getParser()
+    segeCompiler._getStyleResolver(options.style)
+    _worker["options"] = options
+    _worker["cache"] = makeCache(options)
+    _worker["profile"] = segeProfile.Profile() if options.profile else None
+
+def _generateTimed(fname):
+    start = time.time()
+    try:
+        output = generate(fname, _worker["options"], _worker["cache"],
+                          _worker["profile"])
+    except Exception as e:
+        return fname, None, time.time() - start, "%s: %s" % (
+            e.__class__.__name__, e)
+
+    return fname, output, time.time() - start, None
+
+def report(result):
+    fname, output, seconds, error = result
+    if error is not None:
+        print >> sys.stderr, "%s: %s" % (fname, error)
+        return False
+
+    print "%8.1f ms  %s -> %s" % (seconds * 1000, fname, output)
+    return True
+
+def generateAll(files, options):
+    if not files:
+        print >> sys.stderr, "No files to compile"
+        return 0
+
+    start = time.time()
+    pool = None
+    if options.jobs == 1:
+        _initWorker(options)
+        results = (_generateTimed(fname) for fname in files)
+    else:
+        pool = multiprocessing.Pool(min(options.jobs, len(files)),
+                                    _initWorker, (options,))
+        results = pool.imap_unordered(_generateTimed, files)
+
+    failed = 0
+    for result in results:
+        if not report(result):
+            failed += 1
+
+    if pool is not None:
+        pool.close()
+        pool.join()
+
+    print "%d files, %d failed, %.2f s" % (len(files), failed,
+                                          time.time() - start)
+    return failed
+
+def watch(options):
+    # inotify isn't in the standard library so poll modification times.
+    # A file is recompiled once it stopped changing for options.debounce
+    # seconds, editors tend to save in more than one write.
+    _initWorker(options)
+    mtimes = {}
+    changed = {}
+    try:
+        while True:
+            now = time.time()
+            for fname in expandInputs(options.file):
+                try:
+                    mtime = os.stat(fname).st_mtime
+                except OSError:
+                    continue
+
+                if mtimes.get(fname) != mtime:
+                    mtimes[fname] = mtime
+                    changed[fname] = now
+
+            for fname, when in changed.items():
+                if now - when >= options.debounce:
+                    del changed[fname]
+                    report(_generateTimed(fname))
+
+            sys.stdout.flush()
+            time.sleep(options.interval)
+    except KeyboardInterrupt:
+        pass
 
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["serve"]:
+        segeServer.main(sys.argv[2:])
+        sys.exit(0)
+
     parser = argparse.ArgumentParser(description='Sequence Diagram Compiler.')
-    parser.add_argument('file', metavar='FILE', type=str,
-                           help='file to compile')
+    parser.add_argument('file', metavar='FILE', type=str, nargs='+',
+                           help='files, directories or globs to compile')
 
     parser.add_argument('--output', dest="output", metavar='OUT',
-                           help='Output file name', action='store',
-                           default="res.png")
+                           help='Output file name, may use {dir}, {name} and '
+                                '{format} (default: res.FORMAT for one file, '
+                                '%s for more)' % BATCH_OUTPUT,
+                           action='store', default=None)
+
+    parser.add_argument('--format', dest="format",
+                           choices=segeCompiler.FORMATS, default="png",
+                           help='Output format')
+
+    sizing = parser.add_mutually_exclusive_group()
+    sizing.add_argument('--scale', dest="scale", metavar='FACTOR',
+                           type=float, default=1.0,
+                           help='Draw the diagram this many times larger')
+
+    sizing.add_argument('--dpi', dest="dpi", type=float, default=None,
+                           help='Output resolution, %d is the same as '
+                                '--scale 1' % BASE_DPI)
+
+    parser.add_argument('--emit', dest="emit", metavar='FORMAT[@SCALE]=OUT',
+                           type=outputSpec, action='append', default=None,
+                           help='Write this output instead of --output, '
+                                '--format and --scale, may be repeated. OUT '
+                                'may use the same fields as --output')
+
+    parser.add_argument('--max-text-width', dest="maxTextWidth",
+                           metavar='PIXELS', type=float, default=None,
+                           help='Wrap message and note text wider than this')
+
+    parser.add_argument('--strip-height', dest="stripHeight", metavar='ROWS',
+                           type=int, default=None,
+                           help='Render PNG output this many rows at a time '
+                                'to bound memory use')
+
+    parser.add_argument('--cache-dir', dest="cacheDir", metavar='DIR',
+                           help='Reuse unchanged renders from this directory',
+                           action='store', default=None)
+
+    parser.add_argument('--cache-size', dest="cacheSize", metavar='MB',
+                           type=int, help='Cache size limit in megabytes',
+                           default=segeCache.DEFAULT_MAX_SIZE / (1024 * 1024))
+
+    parser.add_argument('--jobs', '-j', dest="jobs", metavar='N', type=int,
+                           help='Worker processes for compiling many files',
+                           default=multiprocessing.cpu_count())
+
+    parser.add_argument('--watch', dest="watch", action='store_true',
+                           help='Keep running and recompile files as they '
+                                'change')
+
+    parser.add_argument('--interval', dest="interval", metavar='SECONDS',
+                           type=float, default=0.2,
+                           help='How often --watch checks for changes')
+
+    parser.add_argument('--debounce', dest="debounce", metavar='SECONDS',
+                           type=float, default=0.1,
+                           help='How long a file has to stay unchanged '
+                                'before --watch recompiles it')
+
+    parser.add_argument('--profile', dest="profile", action='store_true',
+                           help='Print where the time went, implies --jobs 1')
+
+    parser.add_argument('--profile-output', dest="profileOutput",
+                           metavar='FILE', default=None,
+                           help='With --profile, also write cProfile stats '
+                                'to FILE')
 
     options = parser.parse_args(sys.argv[1:])
-    generate(options.file, options)
+    if options.dpi is not None:
+        options.scale = options.dpi / BASE_DPI
+
+    # One style dict for every file, resolved selectors are kept per dict
+    options.style = segeCompiler.boring_style
+    if options.maxTextWidth is not None:
+        options.style = dict(options.style)
+        options.style["max-text-width"] = options.maxTextWidth
+
+    files = expandInputs(options.file)
+    single = len(files) == 1 and files[0] == options.file[0]
+    if options.output is None and not single:
+        options.output = BATCH_OUTPUT
+    elif len(files) > 1 and "{name}" not in options.output:
+        # Every file would be written to the same output
+        parser.error("--output needs {name} with more than one input file")
+
+    profiler = None
+    if options.profile:
+        # Timings from worker processes would be lost
+        options.jobs = 1
+        if options.profileOutput is not None:
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+    failed = 0
+    if options.watch:
+        watch(options)
+    elif single:
+        _initWorker(options)
+        generate(files[0], options, _worker["cache"], _worker["profile"])
+    else:
+        failed = generateAll(files, options)
+
+    if options.profile:
+        _worker["profile"].report()
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(options.profileOutput)
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,391 @@
+#! /usr/bin/env python
+import argparse
+from cStringIO import StringIO
+import json
+import platform
+import random
+import sys
+import timeit
+
+import cairo
+
+import segeCompiler
+import segeParser as sp
+
+ENTITY_COUNTS = (50, 100, 200, 400, 800)
+VIEWPORT = (800, 600)
+# Length of the flat diagram parsed by the throughput benchmark
+THROUGHPUT_MESSAGES = 100000
+# Label sizes in KB and the {N} width for the auto wrap benchmark
+WRAP_SIZES = (4, 16, 64)
+WRAP_WIDTH = 40
+BLOCKS = ("alt", "loop", "opt")
+WORDS = ("request", "reply", "lookup", "update", "cache", "session", "token",
+         "commit", "retry", "fetch", "notify", "query", "ack", "sync")
+
+# Every report() call adds its timing here, see --json
+results = []
+# Dict backed stand ins for the AST node classes, see unslotted()
+_plainClasses = {}
+
+
+# A synthetic diagram. Messages go between random entities and are grouped
+# in runs of nested alt, loop and opt blocks up to depth levels deep. About
+# noteDensity of the messages are followed by a note and every label is
+# labelLength characters long.
+def generateSource(entities=8, messages=300, depth=2, noteDensity=0.1,
+                   labelLength=20, seed=0):
+    rnd = random.Random(seed)
+    names = ["e%d" % i for i in range(max(entities, 2))]
+    lines = []
+
+    def label():
+        words = []
+        while sum(len(word) + 1 for word in words) < labelLength:
+            words.append(rnd.choice(WORDS))
+        return " ".join(words)[:labelLength]
+
+    def flat(count):
+        for i in range(count):
+            src, dst = rnd.sample(names, 2)
+            lines.append('%s->%s "%s"' % (src, dst, label()))
+            if rnd.random() < noteDensity:
+                lines.append('note over %s "%s"' % (dst, label()))
+
+    def block(count, level):
+        if level >= depth or count < 4:
+            flat(count)
+            return
+
+        outside = count // 4
+        inside = count - outside
+        flat(outside)
+        kind = BLOCKS[level % len(BLOCKS)]
+        lines.append('%s "%s" {' % (kind, label()))
+        if kind == "alt":
+            block(inside // 2, level + 1)
+            lines.append('} else "%s" {' % label())
+            block(inside - inside // 2, level + 1)
+        else:
+            block(inside, level + 1)
+        lines.append('}')
+
+    # Nest in runs so deep diagrams don't end up as one long chain
+    run = 4 ** max(depth, 1) * 2
+    for start in range(0, messages, run):
+        block(min(run, messages - start), 0)
+
+    return "\n".join(lines)
+
+
+def entitySource(count):
+    # Neighbour messages and notes on every lifeline plus blocks that span
+    # the whole diagram.
+    lines = []
+    for i in range(count - 1):
+        lines.append('e%d->e%d "call %d"' % (i, i + 1, i))
+        lines.append('note over e%d "note %d"' % (i, i))
+    lines.append('opt "everyone" {\n e0->e%d "wide" \n}' % (count - 1))
+    lines.append('loop 2 {\n e%d<-e0 "back" \n}' % (count - 1))
+    return "\n".join(lines)
+
+
+def sourceParams(options):
+    return {"entities": options.entities,
+            "messages": options.messages,
+            "depth": options.depth,
+            "noteDensity": options.noteDensity,
+            "labelLength": options.labelLength,
+            "seed": options.seed}
+
+
+def benchParse(code, options):
+    fresh = timeit.repeat(lambda: sp.SegeParser().parse(code),
+                          number=options.number, repeat=options.repeat)
+    # Warm the process wide parser so its one time setup isn't counted
+    sp.parse(code)
+    cached = timeit.repeat(lambda: sp.parse(code),
+                           number=options.number, repeat=options.repeat)
+    report("parse (new SegeParser)", fresh, options.number)
+    report("parse (cached parser)", cached, options.number)
+
+
+def benchThroughput(code, options):
+    params = sourceParams(options)
+    params.update(messages=THROUGHPUT_MESSAGES, depth=0)
+    source = generateSource(**params)
+    statements = source.count("\n") + 1
+    sp.parse(source)
+    times = timeit.repeat(lambda: sp.parse(source), number=1,
+                          repeat=options.repeat)
+    report("parse throughput (%d statements)" % statements, times, 1, params,
+           statements)
+
+
+# Bytes held by everything reachable from root, shared objects count once
+def objectSize(root):
+    seen = set()
+    stack = [root]
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, (list, tuple)):
+            stack.extend(obj)
+        elif isinstance(obj, dict):
+            stack.extend(obj.itervalues())
+        elif hasattr(obj, "__dict__"):
+            stack.append(obj.__dict__)
+        else:
+            stack.extend(getattr(obj, slot)
+                         for slot in getattr(type(obj), "__slots__", ()))
+
+    return total
+
+
+# A copy of an AST the way the parser used to build it, every node with an
+# instance __dict__ and every label a string of its own. Entities stay
+# shared like they always were.
+def unslotted(obj, entities=None):
+    if entities is None:
+        entities = {}
+
+    if isinstance(obj, list):
+        return [unslotted(item, entities) for item in obj]
+    if isinstance(obj, str):
+        return obj[:1] + obj[1:]
+    if not hasattr(type(obj), "__slots__"):
+        return obj
+    if id(obj) in entities:
+        return entities[id(obj)]
+
+    cls = type(obj)
+    if cls not in _plainClasses:
+        _plainClasses[cls] = type(cls.__name__, (object,), {})
+    copy = _plainClasses[cls]()
+    if cls is sp.Class:
+        entities[id(obj)] = copy
+    for slot in cls.__slots__:
+        setattr(copy, slot, unslotted(getattr(obj, slot), entities))
+
+    return copy
+
+
+def benchMemory(code, options):
+    params = sourceParams(options)
+    ast = sp.parse(generateSource(**params))
+    compact = objectSize(ast)
+    plain = objectSize(unslotted(ast))
+    reportSize("ast memory (dict backed nodes)", plain, params)
+    reportSize("ast memory (slots, interned labels)", compact, params)
+    print "%-40s %10.2fx" % ("ast memory saving", float(plain) / compact)
+
+
+def benchLexer(code, options):
+    params = sourceParams(options)
+    params.update(messages=THROUGHPUT_MESSAGES, depth=0)
+    source = generateSource(**params)
+    parser = sp.getParser()
+    lexers = (("PLY", parser.lexer.clone), ("fast", lambda: sp.FastLexer(parser)))
+
+    def lex(newLexer):
+        lexer = newLexer()
+        lexer.input(source)
+        return sum(1 for tok in iter(lexer.token, None))
+
+    tokens = lex(lexers[0][1])
+    for name, newLexer in lexers:
+        times = timeit.repeat(lambda: lex(newLexer), number=1,
+                              repeat=options.repeat)
+        report("lex (%s, %d tokens)" % (name, tokens), times, 1, params,
+               tokens, "tokens")
+
+    fast = sp.SegeParser(fastLexer=True)
+    for name, parser in (("PLY", sp.getParser()), ("fast", fast)):
+        times = timeit.repeat(lambda: parser.parse(source), number=1,
+                              repeat=options.repeat)
+        report("parse (%s lexer)" % name, times, 1, params, tokens, "tokens")
+
+
+# Long labels as words and as a payload dump, hex with the odd space
+def wrapLabels(size, seed=0):
+    rnd = random.Random(seed)
+    words = []
+    while sum(len(word) + 1 for word in words) < size:
+        words.append(rnd.choice(WORDS))
+    dump = []
+    while sum(len(chunk) + 1 for chunk in dump) < size:
+        dump.append("%x" % rnd.getrandbits(4 * rnd.randint(8, 256)))
+    return (("words", " ".join(words)[:size]),
+            ("payload", " ".join(dump)[:size]))
+
+
+def benchWrap(code, options):
+    for size in WRAP_SIZES:
+        for kind, label in wrapLabels(size * 1024, options.seed):
+            params = {"size": size * 1024, "width": WRAP_WIDTH,
+                      "label": kind}
+            wrap = lambda: sp.wrapText(label, WRAP_WIDTH)
+            report("wrap (%d KB %s)" % (size, kind),
+                   timeit.repeat(wrap, number=options.number,
+                                 repeat=options.repeat), options.number,
+                   params)
+
+            source = 'note over a "%s"{%d}\nnote over a "x"' % (label,
+                                                               WRAP_WIDTH)
+            report("parse (%d KB %s note)" % (size, kind),
+                   timeit.repeat(lambda: sp.parse(source), number=1,
+                                 repeat=options.repeat), 1, params)
+
+
+def benchEntities(code, options):
+    for count in ENTITY_COUNTS:
+        ast = sp.parse(entitySource(count))
+        layout = lambda: segeCompiler.layout(ast)
+        times = timeit.repeat(layout, number=options.number,
+                              repeat=options.repeat)
+        report("layout (%d entities)" % count, times, options.number,
+               {"entities": count})
+
+
+def benchViewport(code, options):
+    params = {"entities": 20, "messages": 5000, "depth": 0}
+    layout = segeCompiler.layout(sp.parse(generateSource(**params)))
+    width, height = VIEWPORT
+    x = max(0, (layout.width - width) / 2)
+    y = max(0, (layout.height - height) / 2)
+    everything = (0, 0, layout.width, layout.height)
+
+    def replayAll():
+        target = cairo.ImageSurface(cairo.FORMAT_RGB24, width, height)
+        segeCompiler._SegeCompiler().render(layout, target, x, y,
+                                            area=everything)
+
+    culled = lambda: segeCompiler.renderTile(layout, x, y, width, height)
+    report("viewport (replay all operations)",
+           timeit.repeat(replayAll, number=1, repeat=options.repeat), 1,
+           params)
+    report("viewport (culled)",
+           timeit.repeat(culled, number=1, repeat=options.repeat), 1, params)
+
+
+# Time every phase of compiling a generated diagram on its own
+def benchPhases(code, options):
+    params = sourceParams(options)
+    source = generateSource(**params)
+    number, repeat = options.number, options.repeat
+    params["statements"] = source.count("\n") + 1
+
+    ast = sp.parse(source)
+    report("phase: parse", timeit.repeat(lambda: sp.parse(source),
+                                         number=number, repeat=repeat),
+           number, params)
+
+    def coldLayout():
+        segeCompiler.textMetrics.clear()
+        segeCompiler.layout(ast)
+
+    report("phase: layout (cold text metrics)",
+           timeit.repeat(coldLayout, number=number, repeat=repeat),
+           number, params)
+    report("phase: layout",
+           timeit.repeat(lambda: segeCompiler.layout(ast), number=number,
+                         repeat=repeat), number, params)
+
+    layout = segeCompiler.layout(ast)
+    surfaces = []
+
+    def draw():
+        target = segeCompiler.createSurface("png", None, layout.width,
+                                            layout.height)
+        surfaces[:] = [segeCompiler.render(layout, target)]
+
+    report("phase: draw", timeit.repeat(draw, number=1, repeat=repeat), 1,
+           params)
+    report("phase: png encode",
+           timeit.repeat(lambda: surfaces[0].write_to_png(StringIO()),
+                         number=1, repeat=repeat), 1, params)
+    report("phase: banded png",
+           timeit.repeat(lambda: segeCompiler.writeBandedPng(layout,
+                                                             StringIO()),
+                         number=1, repeat=repeat), 1, params)
+
+
+# count is the size of the diagram in units for a rate, such as statements/s
+def report(name, times, number, params=None, count=None, units="statements"):
+    best = min(times) / number
+    result = {"name": name,
+              "seconds": best,
+              "number": number,
+              "repeat": len(times),
+              "params": params or {}}
+    results.append(result)
+    line = "%-40s %10.3f ms/diagram" % (name, best * 1000)
+    if count is not None:
+        result["%sPerSecond" % units] = count / best
+        line += " %10d %s/s" % (count / best, units)
+    print line
+
+
+def reportSize(name, size, params=None):
+    results.append({"name": name,
+                    "bytes": size,
+                    "params": params or {}})
+    print "%-40s %10.1f KB" % (name, size / 1024.0)
+
+
+BENCHMARKS = {"parse": benchParse,
+              "entities": benchEntities,
+              "lexer": benchLexer,
+              "memory": benchMemory,
+              "viewport": benchViewport,
+              "wrap": benchWrap,
+              "phases": benchPhases,
+              "throughput": benchThroughput}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Sege benchmarks.')
+    parser.add_argument('file', metavar='FILE', type=str, nargs='?',
+                        default="test.sege", help='diagram to benchmark with')
+
+    parser.add_argument('--bench', dest="bench", action='append',
+                        choices=sorted(BENCHMARKS),
+                        help='Benchmark to run (default: all)')
+
+    parser.add_argument('--number', dest="number", type=int, default=100,
+                        help='Diagrams per timing run')
+
+    parser.add_argument('--repeat', dest="repeat", type=int, default=3,
+                        help='Timing runs, the best one is reported')
+
+    parser.add_argument('--json', dest="json", metavar='OUT', default=None,
+                        help='Also write the results to OUT as JSON')
+
+    generated = parser.add_argument_group('generated diagrams')
+    generated.add_argument('--entities', dest="entities", type=int, default=8)
+    generated.add_argument('--messages', dest="messages", type=int,
+                           default=300)
+    generated.add_argument('--depth', dest="depth", type=int, default=2,
+                           help='Nesting of alt, loop and opt blocks')
+    generated.add_argument('--note-density', dest="noteDensity", type=float,
+                           default=0.1, help='Notes per message')
+    generated.add_argument('--label-length', dest="labelLength", type=int,
+                           default=20)
+    generated.add_argument('--seed', dest="seed", type=int, default=0)
+
+    options = parser.parse_args(sys.argv[1:])
+    with open(options.file, "r") as f:
+        code = f.read()
+
+    for name in options.bench or sorted(BENCHMARKS):
+        BENCHMARKS[name](code, options)
+
+    if options.json is not None:
+        with open(options.json, "w") as f:
+            json.dump({"sege": segeCompiler.__version__,
+                       "python": platform.python_version(),
+                       "results": results}, f, indent=2, sort_keys=True)
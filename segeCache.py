@@ -0,0 +1,109 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+
+# A directory of rendered diagrams named after the hash of everything that
+# went into rendering them. Entries are touched whenever they are used and
+# the least recently used ones are removed once the directory grows past
+# maxSize bytes.
+class RenderCache(object):
+    def __init__(self, path, maxSize=DEFAULT_MAX_SIZE):
+        self.path = path
+        self.maxSize = maxSize
+        self._size = None
+        try:
+            os.makedirs(path)
+        except OSError:
+            # Possibly created by another process in the meantime
+            if not os.path.isdir(path):
+                raise
+
+    def key(self, *parts):
+        digest = hashlib.sha1()
+        for part in parts:
+            if isinstance(part, unicode):
+                part = part.encode("utf-8")
+            digest.update("%d:%s" % (len(part), part))
+
+        return digest.hexdigest()
+
+    def _entryPath(self, key):
+        return os.path.join(self.path, key)
+
+    def fetch(self, key, output):
+        entry = self._entryPath(key)
+        try:
+            shutil.copyfile(entry, output)
+        except (IOError, OSError):
+            return False
+
+        try:
+            os.utime(entry, None)
+        except OSError:
+            # Evicted by someone else while we were copying it
+            pass
+
+        return True
+
+    def store(self, key, fname):
+        entry = self._entryPath(key)
+        fd, tmp = tempfile.mkstemp(dir=self.path, prefix=".tmp-")
+        os.close(fd)
+        try:
+            shutil.copyfile(fname, tmp)
+            # An entry stored before (by another process for instance) is
+            # replaced and no longer counts
+            try:
+                replaced = os.path.getsize(entry)
+            except OSError:
+                replaced = 0
+            os.rename(tmp, entry)
+        except:
+            os.unlink(tmp)
+            raise
+
+        if self._size is None:
+            self._size = self.size()
+        else:
+            self._size += os.path.getsize(fname) - replaced
+
+        if self._size > self.maxSize:
+            self.evict()
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.path):
+            if name.startswith("."):
+                continue
+
+            try:
+                st = os.stat(self._entryPath(name))
+            except OSError:
+                continue
+
+            entries.append((st.st_mtime, st.st_size, name))
+
+        return entries
+
+    def size(self):
+        return sum(size for mtime, size, name in self._entries())
+
+    def evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for mtime, size, name in entries)
+        for mtime, size, name in entries:
+            if total <= self.maxSize:
+                break
+
+            try:
+                os.unlink(self._entryPath(name))
+            except OSError:
+                pass
+
+            total -= size
+
+        self._size = total
@@ -1,15 +1,29 @@
 from collections import OrderedDict
-from functools import partial
+import math
+import struct
+import sys
+import threading
+import zlib
 
 import cairo
 
 import segeParser as sp
+
+__version__ = "0.1"
+
 DASH_PATTERN = [6, 4]
+CULL_MARGIN = 2
+# Methods timed when a compiler is given a segeProfile.Profile
+PROFILED_METHODS = ("layout", "render", "process", "draw", "getTextExtents",
+                    "getFontExtents", "getTextSize", "wrapText")
 boring_style = {"font-face": ("Sans",
                               cairo.FONT_SLANT_NORMAL,
                               cairo.FONT_WEIGHT_NORMAL),
                 "font-size": (10),
                 "line-spacing": 1,
+                # Wrap message and note text wider than this many pixels,
+                # None leaves it as written
+                "max-text-width": None,
                 "text-color": (0.0, 0.0, 0.0),
                 "background-color": (1.0, 1.0, 1.0),
                 "line-width": 1,
@@ -38,31 +52,367 @@ boring_style = {"font-face": ("Sans",
                 "message.respond.line-type": "dash"}
 
 
-def compileSource(fname):
+# A selector such as ("message.call", "line-type") is looked up as
+# "message.call.line-type", then "message.line-type" and finally "line-type".
+# The result is remembered per selector so later lookups are a dict access,
+# selectors the style doesn't have are remembered as _MISSING.
+_MISSING = object()
+
+class _StyleResolver(object):
+    def __init__(self, style):
+        self.style = style
+        self.resolved = {}
+
+    def resolve(self, rawargs):
+        selector = ".".join(rawargs)
+        args = selector.split(".")
+        for i in range(len(args)):
+            key = ".".join(args[:-(i + 1)] + [args[-1]])
+            if key in self.style:
+                self.resolved[rawargs] = self.style[key]
+                return self.style[key]
+
+        self.resolved[rawargs] = _MISSING
+        raise KeyError(selector)
+
+_styleResolver = None
+
+def _getStyleResolver(style):
+    # Resolved selectors are kept for as long as the same style dict is used
+    global _styleResolver
+    if _styleResolver is None or _styleResolver.style is not style:
+        _styleResolver = _StyleResolver(style)
+
+    return _styleResolver
+
+
+class _LRUCache(object):
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._items.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self._items[key] = value
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = value
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._items)
+
+# Font and text extents keyed by (font-face, font-size[, text]). Shared by
+# the layout and draw phases of every compiler in the process.
+textMetrics = _LRUCache(8192)
+# Advance widths of single characters by (font-face, font-size), so that
+# wrapping can add up the width of a candidate line instead of measuring it.
+# Characters are only ever added and always get the same width, so threads
+# can share the tables without a lock.
+glyphAdvances = {}
+
+
+FORMATS = ("png", "svg", "pdf")
+
+
+def compileSource(fname, fmt="png", output=None, profile=None):
+    with open(fname, "r") as f:
+        ast = sp.parse(f.read(), profile)
+
+    return _SegeCompiler(profile).compile(ast, fmt=fmt, output=output)
+
+
+def compileFile(fname, output, fmt="png", style=boring_style, cache=None,
+                stripHeight=None, scale=1.0, profile=None):
+    compileOutputs(fname, [(fmt, scale, output)], style, cache, stripHeight,
+                   profile)
+
+
+# Compile fname into every (format, scale, file name) of outputs, parsing
+# and laying it out once. When a segeCache.RenderCache is given, outputs
+# are copied from it if the same source was already rendered with the same
+# style, format, scale and sege version.
+#
+# PNG output is rendered in strips of stripHeight rows when it is given, see
+# writeBandedPng().
+#
+# Every phase is timed into profile, a segeProfile.Profile, if it is given.
+def compileOutputs(fname, outputs, style=boring_style, cache=None,
+                   stripHeight=None, profile=None):
     with open(fname, "r") as f:
-        ast = sp.parse(f.read())
+        code = f.read()
+
+    pending = []
+    for fmt, scale, output in outputs:
+        key = None
+        if cache is not None:
+            key = cache.key(__version__, fmt, repr(float(scale)),
+                            repr(sorted(style.items())), code)
+            if cache.fetch(key, output):
+                continue
+
+        pending.append((fmt, scale, output, key))
+
+    if not pending:
+        return
+
+    try:
+        ast = sp.parse(code, profile)
+    except SyntaxError as e:
+        raise SyntaxError("%s: %s" % (fname, e))
+
+    diagram = layout(ast, style, profile)
+    if len(pending) == 1:
+        fmt, scale, output, key = pending[0]
+        writeOutput(diagram, output, fmt, scale, stripHeight, profile)
+    else:
+        # cairo lets go of the GIL while it rasterizes and encodes so the
+        # outputs are rendered side by side
+        errors = []
+        def write(fmt, scale, output, key):
+            try:
+                writeOutput(diagram, output, fmt, scale, stripHeight,
+                            profile)
+            except Exception:
+                errors.append(sys.exc_info())
+
+        threads = [threading.Thread(target=write, args=args)
+                   for args in pending]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            raise errors[0][0], errors[0][1], errors[0][2]
+
+    if cache is not None:
+        for fmt, scale, output, key in pending:
+            cache.store(key, output)
+
+
+def writeOutput(layout, output, fmt="png", scale=1.0, stripHeight=None,
+                profile=None):
+    with open(output, "wb") as f:
+        if fmt == "png" and stripHeight:
+            writeBandedPng(layout, f, stripHeight, scale, profile)
+            return
 
-    return _SegeCompiler().compile(ast)
+        target = createSurface(fmt, f, layout.width * scale,
+                               layout.height * scale)
+        render(layout, target, scale=scale, profile=profile)
+        # Vector formats are written out while they are drawn
+        if fmt == "png":
+            writePng = target.write_to_png
+            if profile is not None:
+                writePng = profile.timed("encode", writePng)
+            writePng(f)
+        target.finish()
+
+
+# ast is a parsed Sequence or an iterable of top level operations, such as
+# segeParser.iterparse(), which are laid out as they come in.
+def layout(ast, style=boring_style, profile=None):
+    return _SegeCompiler(profile).layout(ast, style)
+
+
+# x and y are the diagram coordinates drawn at the top left of surface
+def render(layout, surface, x=0, y=0, scale=1.0, profile=None):
+    return _SegeCompiler(profile).render(layout, surface, x, y, scale)
+
+
+# Render the width x height area of the diagram at x, y into a new
+# ImageSurface, replaying only the draw operations that touch it.
+def renderTile(layout, x, y, width, height, scale=1.0):
+    target = cairo.ImageSurface(cairo.FORMAT_RGB24,
+                                int(math.ceil(width * scale)),
+                                int(math.ceil(height * scale)))
+    return _SegeCompiler().render(layout, target, x, y, scale,
+                                  (x, y, x + width, y + height))
+
+
+def createSurface(fmt, output, width, height):
+    if fmt == "png":
+        return cairo.ImageSurface(cairo.FORMAT_RGB24, int(width), int(height))
+    elif fmt == "svg":
+        return cairo.SVGSurface(output, width, height)
+    elif fmt == "pdf":
+        return cairo.PDFSurface(output, width, height)
+
+    raise ValueError("Unknown output format '%s'" % fmt)
+
+
+def _writePngChunk(f, chunkType, data):
+    f.write(struct.pack(">I", len(data)))
+    f.write(chunkType)
+    f.write(data)
+    f.write(struct.pack(">I", zlib.crc32(chunkType + data) & 0xffffffff))
+
+
+# Write layout to f as a PNG without ever holding the whole image. The
+# diagram is rendered stripHeight rows at a time and every strip is
+# compressed and written out before the next one is drawn.
+def writeBandedPng(layout, f, stripHeight=256, scale=1.0, profile=None):
+    width = int(layout.width * scale)
+    height = int(layout.height * scale)
+    f.write("\x89PNG\r\n\x1a\n")
+    _writePngChunk(f, "IHDR", struct.pack(">IIBBBBB", width, height,
+                                          8, 2, 0, 0, 0))
+    # RGB24 pixels are native endian 32 bit words holding 0x00RRGGBB
+    if sys.byteorder == "little":
+        red, green, blue = 2, 1, 0
+    else:
+        red, green, blue = 1, 2, 3
+
+    compressor = zlib.compressobj()
+    compress = compressor.compress
+    if profile is not None:
+        compress = profile.timed("encode", compress)
+    for top in range(0, height, stripHeight):
+        rows = min(stripHeight, height - top)
+        strip = cairo.ImageSurface(cairo.FORMAT_RGB24, width, rows)
+        render(layout, strip, 0, top / scale, scale, profile)
+        data = bytearray(strip.get_data())
+        stride = strip.get_stride()
+        scanlines = []
+        for row in range(rows):
+            pixels = data[row * stride:row * stride + width * 4]
+            # Every scanline starts with its filter type, 0 is no filtering
+            scanline = bytearray(1 + width * 3)
+            scanline[1::3] = pixels[red::4]
+            scanline[2::3] = pixels[green::4]
+            scanline[3::3] = pixels[blue::4]
+            scanlines.append(str(scanline))
+
+        del strip, data
+        compressed = compress("".join(scanlines))
+        if compressed:
+            _writePngChunk(f, "IDAT", compressed)
+
+    _writePngChunk(f, "IDAT", compressor.flush())
+    _writePngChunk(f, "IEND", "")
+
+
+# Finds the draw operations of a layer that intersect an area. Operations
+# are put in every bucket of BUCKET_HEIGHT rows they cover, diagrams grow
+# downwards so that is enough to skip nearly everything outside the area.
+class _DrawOpIndex(object):
+    BUCKET_HEIGHT = 256
+
+    def __init__(self, ops):
+        self.ops = ops
+        self.buckets = {}
+        for i, (name, args, (x0, y0, x1, y1)) in enumerate(ops):
+            for bucket in self._bucketRange(y0, y1):
+                self.buckets.setdefault(bucket, []).append(i)
+
+    def _bucketRange(self, top, bottom):
+        return range(int(top // self.BUCKET_HEIGHT),
+                     int(bottom // self.BUCKET_HEIGHT) + 1)
+
+    # Matching operations, in drawing order
+    def query(self, x0, y0, x1, y1):
+        found = set()
+        ops = self.ops
+        for bucket in self._bucketRange(y0, y1):
+            for i in self.buckets.get(bucket, ()):
+                bx0, by0, bx1, by1 = ops[i][2]
+                if bx0 <= x1 and bx1 >= x0 and by0 <= y1 and by1 >= y0:
+                    found.add(i)
+
+        return [ops[i] for i in sorted(found)]
+
+
+# The result of laying out a diagram, plain data only so it can be kept,
+# pickled and rendered any number of times.
+#
+# entities - left to right, dicts with the "name", lifeline "location" and
+#            "activity" spans of every entity
+# layers   - (draw method name, args, (x0, y0, x1, y1) bounds) tuples, see
+#            _SegeCompiler.render()
+# metrics  - the font and text extents measured while laying out
+class SegeLayout(object):
+    def __init__(self, style, width, height, bottom, entities, layers,
+                 metrics):
+        self.style = style
+        self.width = width
+        self.height = height
+        self.bottom = bottom
+        self.entities = entities
+        self.layers = layers
+        self.metrics = metrics
+        self._indexes = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_indexes"] = None
+        return state
+
+    # Draw operations of every layer intersecting the given area
+    def query(self, x0, y0, x1, y1):
+        if self._indexes is None:
+            self._indexes = [_DrawOpIndex(ops) for ops in self.layers]
+
+        return [index.query(x0, y0, x1, y1) for index in self._indexes]
+
+    def __repr__(self):
+        return "SegeLayout(%dx%d, %d entities)" % (self.width, self.height,
+                                                   len(self.entities))
 
 
 class _SegeCompiler(object):
-    def __init__(self):
+    def __init__(self, profile=None):
         self.entities = OrderedDict()
+        # Entities by their "index", left to right
+        self._entityOrder = []
+        # Distance of every lifeline from the previous one (or from the page
+        # edge for the first one) as a Fenwick tree, 1 based. Moving a
+        # lifeline and finding where one is are both O(log entities).
+        self._gapTree = [0]
         self.layers = [[], [], []]
         self._bottom = 0
         self._extraRightPadding = 0
+        # Text extents used by this compiler, see getTextExtents(). When
+        # rendering, _layoutMetrics are the ones of the layout and _measured
+        # only holds what the layout did not measure.
+        self._layoutMetrics = {}
+        self._measured = {}
+        # (style, text) -> text wrapped to the style's max-text-width
+        self._wrapped = {}
+        self._layout = None
+        if profile is not None:
+            profile.instrument(self, [name for name in dir(self)
+                                      if name.startswith(PROFILED_METHODS)])
 
     def getStyle(self, *rawargs):
-        selector = ".".join(rawargs)
-        args = selector.split(".")
-        for i in range(len(args)):
-            try:
-                key = ".".join(args[:-(i + 1)] + [args[-1]])
-                #print "trying", key
-                return self._style[key]
-            except KeyError:
-                pass
-        raise KeyError(selector)
+        try:
+            value = self._resolvedStyle[rawargs]
+        except KeyError:
+            return self._styleResolver.resolve(rawargs)
+
+        if value is _MISSING:
+            raise KeyError(".".join(rawargs))
+        return value
 
     def processOperation(self, op):
         try:
@@ -77,12 +427,29 @@ class _SegeCompiler(object):
 
     def getFontExtents(self, stylePrefix):
         pfx = stylePrefix
-        self.ctx.select_font_face(*self.getStyle(pfx, "font-face"))
-        self.ctx.set_font_size(self.getStyle(pfx, "font-size"))
-        return self.ctx.font_extents()
+        key = (self.getStyle(pfx, "font-face"), self.getStyle(pfx, "font-size"))
+        try:
+            return self._layoutMetrics[key]
+        except KeyError:
+            pass
+
+        try:
+            return self._measured[key]
+        except KeyError:
+            pass
+
+        extents = textMetrics.get(key)
+        if extents is None:
+            self.ctx.select_font_face(*key[0])
+            self.ctx.set_font_size(key[1])
+            extents = self.ctx.font_extents()
+            textMetrics.put(key, extents)
+
+        self._measured[key] = extents
+        return extents
 
     def getTotalSize(self):
-        lastEnt = self.entities.keys()[-1]
+        lastEnt = self._entityOrder[-1]
         center = self.getEntityBoxLocation(lastEnt)
         width = self.getEntityBoxSize(lastEnt)[0]
         totalWidth = center + (width / 2) + self._extraRightPadding
@@ -110,58 +477,142 @@ class _SegeCompiler(object):
         pt = self.getStyle("page", "padding")[0]
         return self.getBoxedTextSize("TEXT", "entity")[1] + pt
 
-    def compile(self, ast, style=boring_style):
+    def setStyle(self, style):
         self._style = style
+        self._styleResolver = _getStyleResolver(style)
+        self._resolvedStyle = self._styleResolver.resolved
+
+    def layout(self, ast, style=boring_style):
+        self.setStyle(style)
         target = cairo.ImageSurface(cairo.FORMAT_RGB24, 1, 1)
         self.ctx = cairo.Context(target)
         self._bottom = self.getHeaderHeight()
-        self.processOperation(ast)
-
-        target = cairo.ImageSurface(cairo.FORMAT_RGB24,
-                                    *[int(arg) for arg in self.getTotalSize()])
+        if isinstance(ast, sp.Sequence):
+            self.processOperation(ast)
+        else:
+            for op in ast:
+                self.processOperation(op)
+
+        width, height = self.getTotalSize()
+        entities = [{"name": ent.name,
+                     "location": self.getEntityBoxLocation(ent),
+                     "activity": self.entities[ent]["activity"]}
+                    for ent in self._entityOrder]
+        layers = [[], [], []]
+        self._layout = SegeLayout(style, width, height, self._bottom, entities,
+                                  layers, self._measured)
+        # Bounds are worked out once lifelines stopped moving
+        for ops, pending in zip(layers, self.layers):
+            for name, args in pending:
+                bounds = getattr(self, "get%sBounds" % name[4:])(*args)
+                ops.append((name, args, bounds))
+
+        return self._layout
+
+    def addDrawOp(self, layer, name, *args):
+        self.layers[layer].append((name, args))
+
+    # Draw layout on target, x and y are the diagram coordinates put at the
+    # top left of target. Only the draw operations touching area, an
+    # (x0, y0, x1, y1) rectangle in diagram coordinates, are replayed. It
+    # defaults to the part of the diagram that ends up on target.
+    def render(self, layout, target, x=0, y=0, scale=1.0, area=None):
+        self.setStyle(layout.style)
+        self._layout = layout
+        self._layoutMetrics = layout.metrics
+        self._measured = {}
         ctx = self.ctx = cairo.Context(target)
+        ctx.scale(scale, scale)
+        ctx.translate(-x, -y)
+        if area is None:
+            area = ctx.clip_extents()
+
+        # Text extents can stick out of the bounds a little
+        x0, y0, x1, y1 = area
+        self._visible = (x0 - CULL_MARGIN, y0 - CULL_MARGIN,
+                         x1 + CULL_MARGIN, y1 + CULL_MARGIN)
+        if x0 <= 0 and y0 <= 0 and x1 >= layout.width and y1 >= layout.height:
+            layers = layout.layers
+        else:
+            layers = layout.query(*self._visible)
+
         ctx.set_source_rgb(*self.getStyle("page.background-color"))
-        ctx.rectangle(0, 0, *self.getTotalSize())
+        ctx.rectangle(0, 0, layout.width, layout.height)
         ctx.fill()
-        for drawOp in self.layers[0]:
-            drawOp()
+        for name, args, bounds in layers[0]:
+            getattr(self, name)(*args)
         self.drawBase()
-        for layer in self.layers[1:]:
-            for drawOp in layer:
-                drawOp()
+        for layer in layers[1:]:
+            for name, args, bounds in layer:
+                getattr(self, name)(*args)
 
         target.flush()
         return target
 
-    def drawBase(self):
-        for ent in self.entities:
-            self.drawEntityBox(ent)
-            self.drawLifeLine(ent)
+    # Vector formats are streamed to output (a file name or a file object)
+    # as they are drawn and are complete once the returned surface is
+    # finished. PNG output is left to the caller through write_to_png().
+    #
+    # The diagram is laid out at its natural size and then drawn scale times
+    # larger.
+    def compile(self, ast, style=boring_style, fmt="png", output=None,
+                scale=1.0):
+        layout = self.layout(ast, style)
+        target = createSurface(fmt, output, layout.width * scale,
+                               layout.height * scale)
+        return self.render(layout, target, scale=scale)
+
+    def getLifeLineLocation(self, index):
+        return self._layout.entities[index]["location"]
 
-    def drawEntityBox(self, ent):
-        center = self.getEntityBoxLocation(ent)
-        width = self.getEntityBoxSize(ent)[0]
+    def drawBase(self):
+        x0, y0, x1, y1 = self._visible
+        pt = self.getStyle("page", "padding")[0]
+        for index, ent in enumerate(self._layout.entities):
+            center = self.getLifeLineLocation(index)
+            width, height = self.getBoxedTextSize(ent["name"], "entity")
+            if center + width / 2 < x0 or center - width / 2 > x1:
+                continue
+
+            if y0 <= pt + height:
+                self.drawEntityBox(index)
+            self.drawLifeLine(index)
+
+    def drawEntityBox(self, index):
+        name = self._layout.entities[index]["name"]
+        center = self.getLifeLineLocation(index)
+        width = self.getBoxedTextSize(name, "entity")[0]
         #TODO : implement left\right page padding
         pt = self.getStyle("page", "padding")[0]
-        self.drawBoxedText((center - width / 2), pt, ent.name, "entity")
+        self.drawBoxedText((center - width / 2), pt, name, "entity")
 
-    def drawLifeLine(self, ent):
-        center = self.getEntityBoxLocation(ent)
-        height = self.getEntityBoxSize(ent)[1]
+    def drawLifeLine(self, index):
+        ent = self._layout.entities[index]
+        center = self.getLifeLineLocation(index)
+        height = self.getBoxedTextSize(ent["name"], "entity")[1]
         pt, pr, pb, pl = self.getStyle("entity", "padding")
-        self.drawLine(center, height - pb, center, self._bottom, "lifeline")
+        x0, y0, x1, y1 = self._visible
+        # Only stroke the visible part, starting the dash pattern where the
+        # whole line would have it
+        top = max(height - pb, y0)
+        bottom = min(self._layout.bottom, y1)
+        if top < bottom:
+            self.drawLine(center, top, center, bottom, "lifeline",
+                          top - (height - pb))
         actBoxWidth = self.getStyle("activity-box-width")
-        for (actStart, actStop) in self.entities[ent]["activity"]:
+        for (actStart, actStop) in ent["activity"]:
             if actStop is None:
-                actStop == self._bottom
+                actStop = self._layout.bottom
+            if actStop < y0 or actStart > y1:
+                continue
             self.drawRectangle(center - actBoxWidth / 2, actStart,
                                actBoxWidth, actStop - actStart, "activity-box")
 
-    def drawLine(self, x, y, x2, y2, stylePrefix):
+    def drawLine(self, x, y, x2, y2, stylePrefix, dashOffset=0):
         self.ctx.set_source_rgb(*self.getStyle(stylePrefix, "color"))
         self.ctx.set_line_width(self.getStyle(stylePrefix, "line-width"))
         if self.getStyle(stylePrefix, "line-type") == "dash":
-            self.ctx.set_dash(DASH_PATTERN)
+            self.ctx.set_dash(DASH_PATTERN, dashOffset)
         self.ctx.move_to(x, y)
         self.ctx.line_to(x2, y2)
         self.ctx.stroke()
@@ -175,9 +626,10 @@ class _SegeCompiler(object):
         #TODO : implement left\right of
         #TODO : handle activated lifelines better
         style = "note.%s" % op.position
-        width, height = self.getBoxedTextSize(op.text, style)
-        ents = self.entities.keys()
-        myIndex = ents.index(op.entity)
+        text = self.wrapText(op.text, style)
+        width, height = self.getBoxedTextSize(text, style)
+        ents = self._entityOrder
+        myIndex = self.entities[op.entity]["index"]
         if myIndex == 0:
             pent = None
         else:
@@ -190,14 +642,18 @@ class _SegeCompiler(object):
             self._extraRightPadding = max(self._extraRightPadding, padding)
         else:
             self.adjustLifeLineDistance(op.entity, nent, width / 2)
-        self.layers[1].append(partial(self.drawNote, self._bottom, op.entity,
-                                      op.position, op.text))
+        self.addDrawOp(1, "drawNote", self._bottom, myIndex, op.position, text)
         self._bottom += height
 
+    def getNoteBounds(self, top, entity, position, text):
+        width, height = self.getBoxedTextSize(text, "note.%s" % position)
+        center = self.getLifeLineLocation(entity)
+        return (center - width / 2, top, center + width / 2, top + height)
+
     def drawNote(self, top, entity, position, text):
         style = "note.%s" % position
         width, height = self.getBoxedTextSize(text, style)
-        center = self.getEntityBoxLocation(entity)
+        center = self.getLifeLineLocation(entity)
         self.drawBoxedText(center - width / 2, top, text, style)
 
     def processWait(self, op):
@@ -228,23 +684,43 @@ class _SegeCompiler(object):
 
     def processDeclareEntity(self, op):
         if len(self.entities) == 0:
-            prevEnt = None
             offset = 0
         else:
-            prevEnt = self.entities.keys()[-1]
+            prevEnt = self._entityOrder[-1]
             offset = self.getEntityBoxSize(prevEnt)[0] / 2
         offset += self.getEntityBoxSize(op.entity)[0] / 2
 
-        self.entities[op.entity] = {"locationConstraint": (prevEnt, offset),
+        self.entities[op.entity] = {"index": len(self._gapTree) - 1,
                                     "active": False,
                                     "activity": []}
+        self._entityOrder.append(op.entity)
+        self._appendGap(offset)
 
     def getEntityBoxLocation(self, ent):
-        relEnt, offset = self.entities[ent]["locationConstraint"]
-        if relEnt is None:
-            return offset
-        else:
-            return offset + self.getEntityBoxLocation(relEnt)
+        return self._sumGaps(self.entities[ent]["index"] + 1)
+
+    # Sum of the first count gaps
+    def _sumGaps(self, count):
+        tree = self._gapTree
+        total = 0
+        while count > 0:
+            total += tree[count]
+            count -= count & -count
+
+        return total
+
+    def _appendGap(self, gap):
+        # Node i holds the sum of gaps (i - lowbit(i), i]
+        i = len(self._gapTree)
+        self._gapTree.append(gap + self._sumGaps(i - 1) -
+                             self._sumGaps(i - (i & -i)))
+
+    def _addGap(self, index, delta):
+        tree = self._gapTree
+        i = index + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
 
     def adjustLifeLineDistance(self, entA, entB, width):
         if entA is None:
@@ -260,7 +736,8 @@ class _SegeCompiler(object):
             dist = lifelineA - lifelineB
 
         if dist < width:
-            self.entities[entB]["locationConstraint"] = (entA, width)
+            # Move entB and everything to its right
+            self._addGap(self.entities[entB]["index"], width - dist)
 
     def processAlt(self, alt):
         style = "block.alt"
@@ -270,7 +747,7 @@ class _SegeCompiler(object):
                                                  style)
             totalWidth = max(totalWidth, width)
 
-        self.adjustLifeLineDistance(None, self.entities.keys()[0], totalWidth)
+        self.adjustLifeLineDistance(None, self._entityOrder[0], totalWidth)
 
         pt, pr, pb, pl = self.getStyle(style, "padding")
         mt, mr, mb, ml = self.getStyle(style, "margin")
@@ -281,9 +758,8 @@ class _SegeCompiler(object):
         height = self.getBlockMinSize("alt", firstOp.condition, style)[1]
         self._bottom = max(self._bottom, top + height)
         for op in alt.conditions[1:]:
-            self.layers[2].append(partial(self.drawBlockSeperator,
-                                          self._bottom,
-                                          "[%s]" % op.condition, style))
+            self.addDrawOp(2, "drawBlockSeperator", self._bottom,
+                           "[%s]" % op.condition, style)
             mytop = self._bottom
             self._bottom += pt + mt
             self.processOperation(op.sequence)
@@ -292,26 +768,25 @@ class _SegeCompiler(object):
         self._bottom += pb + mb
         bottom = self._bottom
 
-        self.layers[0].append(partial(self.drawBlockBackground, top, bottom,
-                                      style))
-        self.layers[2].append(partial(self.drawBlockFrame,
-                                      top,
-                                      bottom,
-                                      "alt",
-                                      "[%s]" % alt.conditions[0].condition,
-                                      style))
+        self.addDrawOp(0, "drawBlockBackground", top, bottom, style)
+        self.addDrawOp(2, "drawBlockFrame", top, bottom, "alt",
+                       "[%s]" % alt.conditions[0].condition, style)
 
     def getBlockSeperatorHeight(self, text, style):
         mt, mr, mb, ml = self.getStyle(style, "margin")
         return self.getTextSize(text, style)[1] + mt
 
+    def getBlockSeperatorBounds(self, pos, text, style):
+        return (0, pos, self._layout.width,
+                pos + self.getBlockSeperatorHeight(text, style))
+
     def drawBlockSeperator(self, pos, text, style):
         ppt, ppr, ppb, ppl = self.getStyle("page", "padding")
         pt, pr, pb, pl = self.getStyle(style, "padding")
         mt, mr, mb, ml = self.getStyle(style, "margin")
         self.ctx.set_source_rgb(*self.getStyle(style, "color"))
 
-        width = self.getTotalSize()[0]
+        width = self._layout.width
         width -= ppl + pl + ppr + pr
 
         if self.getStyle(style, "seperator-style") == "dash":
@@ -331,16 +806,18 @@ class _SegeCompiler(object):
     def processMessage(self, msg):
         srcActive = self.entities[msg.src]["active"]
         dstActive = self.entities[msg.dst]["active"]
-        self.layers[1].append(partial(self.drawMessage, msg, self._bottom,
-                                      srcActive, dstActive))
+        text = self.wrapText(msg.text, "message.%s" % msg.msgType)
+        self.addDrawOp(1, "drawMessage", self.entities[msg.src]["index"],
+                       self.entities[msg.dst]["index"], msg.msgType, text,
+                       self._bottom, srcActive, dstActive)
 
-        width, height = self.getMessageBoxSize(msg)
+        width, height = self.getMessageBoxSize(msg, text)
         self._bottom += height
         self.adjustLifeLineDistance(msg.src, msg.dst, width)
 
     def processBlock(self, title, text, op, style):
         width, height = self.getBlockMinSize(title, text, style)
-        self.adjustLifeLineDistance(None, self.entities.keys()[0], width)
+        self.adjustLifeLineDistance(None, self._entityOrder[0], width)
 
         pt, pr, pb, pl = self.getStyle(style, "padding")
         mt, mr, mb, ml = self.getStyle(style, "margin")
@@ -350,21 +827,25 @@ class _SegeCompiler(object):
         self._bottom += pb + mb
         self._bottom = bottom = max(self._bottom, top + height)
 
-        self.layers[0].append(partial(self.drawBlockBackground, top, bottom,
-                                      style))
-        self.layers[2].append(partial(self.drawBlockFrame, top, bottom, title,
-                                      text, style))
+        self.addDrawOp(0, "drawBlockBackground", top, bottom, style)
+        self.addDrawOp(2, "drawBlockFrame", top, bottom, title, text, style)
+
+    def getBlockBackgroundBounds(self, top, bottom, style):
+        return (0, top, self._layout.width, bottom)
 
     def drawBlockBackground(self, top, bottom, style):
         ppt, ppr, ppb, ppl = self.getStyle("page", "padding")
         pt, pr, pb, pl = self.getStyle(style, "padding")
         mt, mr, mb, ml = self.getStyle(style, "margin")
-        width = self.getTotalSize()[0]
+        width = self._layout.width
         self.ctx.set_source_rgb(*self.getStyle(style, "background-color"))
         width -= ppl + pl + ppr + pr
         self.ctx.rectangle(ppl + pl, top + pt, width, bottom - top - pb - pt)
         self.ctx.fill()
 
+    def getBlockFrameBounds(self, top, bottom, title, text, style):
+        return (0, top, self._layout.width, bottom)
+
     def drawBlockFrame(self, top, bottom, title, text, style):
         ppt, ppr, ppb, ppl = self.getStyle("page", "padding")
         pt, pr, pb, pl = self.getStyle(style, "padding")
@@ -374,7 +855,7 @@ class _SegeCompiler(object):
         titleWidth, titleHeight = self.getTextSize(title, style)
         textWidth, textHeight = self.getTextSize(text, style)
 
-        width = self.getTotalSize()[0]
+        width = self._layout.width
         width -= ppl + pl + ppr + pr
 
         self.ctx.rectangle(ppl + pl, top + pt, width, bottom - top - pb - pt)
@@ -401,9 +882,9 @@ class _SegeCompiler(object):
         return (pr + mr + max(textWidth, titleWidth) + ml + pl,
                 pt + mt + titleHeight + mb + mt + textHeight + mb + pb)
 
-    def getMessageBoxSize(self, msg):
+    def getMessageBoxSize(self, msg, text):
         style = "message.%s" % msg.msgType
-        textWidth, textHeight = self.getTextSize(msg.text, style)
+        textWidth, textHeight = self.getTextSize(text, style)
         arrowheadWith, arrowheadHeight = self.getStyle(style, "arrowhead-size")
         pt, pr, pb, pl = self.getStyle(style, "padding")
         mt, mr, mb, ml = self.getStyle(style, "margin")
@@ -417,13 +898,27 @@ class _SegeCompiler(object):
         return (boxPad + pl + ml + textWidth + arrowheadWith + mr + pr,
                 pt + mt + textHeight + (arrowheadHeight / 2) + mb + pb)
 
-    def drawMessage(self, msg, top, srcActive, dstActive):
-        srcLoc = self.getEntityBoxLocation(msg.src)
-        dstLoc = self.getEntityBoxLocation(msg.dst)
-        style = "message.%s" % msg.msgType
+    def getMessageBounds(self, src, dst, msgType, text, top, srcActive,
+                         dstActive):
+        srcLoc = self.getLifeLineLocation(src)
+        dstLoc = self.getLifeLineLocation(dst)
+        style = "message.%s" % msgType
+        mt, mr, mb, ml = self.getStyle(style, "margin")
+        textWidth, textHeight = self.getTextSize(text, style)
+        arrowheadWith, arrowheadHeight = self.getStyle(style, "arrowhead-size")
+        # The label starts next to the source lifeline on either side
+        left = min(srcLoc, dstLoc, srcLoc - textWidth - mr) - arrowheadWith
+        right = max(srcLoc, dstLoc, srcLoc + ml + textWidth) + arrowheadWith
+        return (left, top, right,
+                top + textHeight + mb + mt + arrowheadHeight / 2)
+
+    def drawMessage(self, src, dst, msgType, text, top, srcActive, dstActive):
+        srcLoc = self.getLifeLineLocation(src)
+        dstLoc = self.getLifeLineLocation(dst)
+        style = "message.%s" % msgType
         pt, pr, pb, pl = self.getStyle(style, "padding")
         mt, mr, mb, ml = self.getStyle(style, "margin")
-        textWidth, textHeight = self.getTextSize(msg.text, style)
+        textWidth, textHeight = self.getTextSize(text, style)
         bearing = dstLoc - srcLoc
         bearing = bearing / abs(bearing)
         #TODO : implement horizontal padding
@@ -445,7 +940,7 @@ class _SegeCompiler(object):
 
         self.drawLine(srcLoc, top + textHeight + mb + mt, dstLoc, top +
                       textHeight + mb + mt, style)
-        self.drawText(textLoc, top, msg.text, style)
+        self.drawText(textLoc, top, text, style)
         self.drawArrowHead(bearing, dstLoc, top + textHeight, style)
 
     def drawArrowHead(self, bearing, x, y, stylePrefix):
@@ -472,9 +967,120 @@ class _SegeCompiler(object):
 
     def getTextExtents(self, text, stylePrefix):
         pfx = stylePrefix
-        self.ctx.select_font_face(*self.getStyle("%s.font-face" % pfx))
-        self.ctx.set_font_size(self.getStyle("%s.font-size" % pfx))
-        return self.ctx.text_extents(text)
+        key = (self.getStyle(pfx, "font-face"), self.getStyle(pfx, "font-size"),
+               text)
+        try:
+            return self._layoutMetrics[key]
+        except KeyError:
+            pass
+
+        try:
+            return self._measured[key]
+        except KeyError:
+            pass
+
+        extents = textMetrics.get(key)
+        if extents is None:
+            self.ctx.select_font_face(*key[0])
+            self.ctx.set_font_size(key[1])
+            extents = self.ctx.text_extents(text)
+            textMetrics.put(key, extents)
+
+        self._measured[key] = extents
+        return extents
+
+    def getGlyphAdvances(self, text, stylePrefix):
+        pfx = stylePrefix
+        key = (self.getStyle(pfx, "font-face"), self.getStyle(pfx, "font-size"))
+        advances = glyphAdvances.get(key)
+        if advances is None:
+            advances = glyphAdvances.setdefault(key, {})
+
+        missing = set(text).difference(advances)
+        if missing:
+            self.ctx.select_font_face(*key[0])
+            self.ctx.set_font_size(key[1])
+            for char in missing:
+                advances[char] = self.ctx.text_extents(char)[4]
+
+        return advances
+
+    # Wrap text to the max-text-width of stylePrefix. Lines are broken
+    # between words, words that don't fit a line on their own anywhere.
+    # Text that already fits is returned as is.
+    def wrapText(self, text, stylePrefix):
+        try:
+            maxWidth = self.getStyle(stylePrefix, "max-text-width")
+        except KeyError:
+            # Styles from before max-text-width don't wrap
+            maxWidth = None
+        if maxWidth is None:
+            return text
+
+        key = (stylePrefix, text)
+        try:
+            return self._wrapped[key]
+        except KeyError:
+            pass
+
+        wrapped = utext = text
+        if isinstance(text, str):
+            try:
+                utext = text.decode("utf-8")
+            except UnicodeDecodeError:
+                utext = None
+
+        if utext is not None:
+            lines = self._wrapLines(utext, stylePrefix, maxWidth)
+            if lines is not None:
+                wrapped = u"\n".join(lines)
+                if isinstance(text, str):
+                    wrapped = wrapped.encode("utf-8")
+
+        self._wrapped[key] = wrapped
+        return wrapped
+
+    # The lines of text wrapped to maxWidth, None if it fits as it is
+    def _wrapLines(self, text, stylePrefix, maxWidth):
+        advances = self.getGlyphAdvances(text + u" ", stylePrefix)
+        width = lambda part: sum(map(advances.__getitem__, part))
+        space = advances[u" "]
+        lines = text.split(u"\n")
+        if all(width(line) <= maxWidth for line in lines):
+            return None
+
+        wrapped = []
+        for line in lines:
+            words = []
+            lineWidth = 0
+            for word in line.split(u" "):
+                wordWidth = width(word)
+                # Runs of spaces give empty words, which never break a line
+                if word and words and lineWidth + space + wordWidth > maxWidth:
+                    wrapped.append(u" ".join(words))
+                    words = []
+                    lineWidth = 0
+
+                if wordWidth > maxWidth:
+                    # Only long words get measured a character at a time
+                    start = 0
+                    wordWidth = 0
+                    for i, char in enumerate(word):
+                        if i > start and wordWidth + advances[char] > maxWidth:
+                            wrapped.append(word[start:i])
+                            start = i
+                            wordWidth = 0
+                        wordWidth += advances[char]
+                    word = word[start:]
+
+                if words:
+                    lineWidth += space
+                words.append(word)
+                lineWidth += wordWidth
+
+            wrapped.append(u" ".join(words))
+
+        return wrapped
 
     def drawText(self, x, y, text, stylePrefix):
         pfx = stylePrefix
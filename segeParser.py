@@ -1,9 +1,123 @@
 from collections import OrderedDict
+from cStringIO import StringIO
+import hashlib
+import os
+import Queue
+import re
+import sys
+import threading
+import time
 
 import ply.lex as lex
 import ply.yacc as yacc
 
+LEXTAB = "lextab"
+# iterparse() reads files this many bytes at a time and hands operations
+# from the parsing thread to the caller in batches of STREAM_BATCH_SIZE,
+# with at most STREAM_QUEUE_SIZE batches waiting.
+CHUNK_SIZE = 64 * 1024
+STREAM_BATCH_SIZE = 64
+STREAM_QUEUE_SIZE = 16
+MESSAGE_TYPES = {"->": "call", "~>": "send", "<-": "respond"}
+
+# Strings, which may span lines, and comments, which may hold quotes. A
+# string only counts once its closing quote has been read, the lookahead
+# keeps the match from backtracking to an escaped quote the way the lexer
+# would at the end of the input.
+_SPLITTER = re.compile(r'"(?=((?:\\"|[^"])*))\1"|(")|\#.*|\n')
+
+
+# Offset just past the last line break of text that the lexer wouldn't see
+# inside a string or comment, 0 if there is none.
+def _splitPoint(text):
+    cut = 0
+    for match in _SPLITTER.finditer(text):
+        if match.group(2):
+            # Unterminated string, wait for more input
+            break
+        if match.group() == "\n":
+            cut = match.end()
+
+    return cut
+
+
+# Read f in pieces that can be lexed on their own
+def _readChunks(f, size):
+    pending = ""
+    while True:
+        data = f.read(size)
+        if not data:
+            break
+
+        pending += data
+        cut = _splitPoint(pending)
+        if cut:
+            yield pending[:cut]
+            pending = pending[cut:]
+
+    if pending:
+        yield pending
+
+
+class _Abandoned(Exception):
+    pass
+
+
+# Big diagrams repeat the same labels over and over, keep one copy of each.
+# intern() only takes byte strings.
+def _intern(text):
+    if type(text) is str:
+        return intern(text)
+    return text
+
+
+# Break text into lines of about width characters for "..."{width} strings.
+# A line is broken at its last space, or at the first one after it when a
+# word is longer than width, and text that already has a line break within
+# width is left alone. The breaks are collected in one pass and the text is
+# joined once, a long label used to be copied for every break.
+#
+# Keeps the quirks of the original: the wrap gives up once it gets within
+# a character of the end, a space at the very start never counts and the
+# line after a break starts one character late.
+def wrapText(text, width):
+    length = len(text)
+    breaks = []
+    i = 0
+    while i + width < length:
+        newline = text.find("\n", i, i + width)
+        if newline != -1:
+            i = newline + 1
+            continue
+
+        j = text.rfind(" ", i, i + width)
+        if j < 1:
+            j = text.find(" ", i + width)
+            if j == -1 or j >= length - 2:
+                break
+        elif i + width == length - 1:
+            break
+
+        breaks.append(j)
+        i = j + 2
+
+    if not breaks:
+        return text
+
+    lines = []
+    start = 0
+    for j in breaks:
+        lines.append(text[start:j])
+        start = j + 1
+    lines.append(text[start:])
+    return "\n".join(lines)
+
+
+# AST nodes use __slots__, there can be millions of them between parsing
+# and compiling.
 class Class(object):
+    __slots__ = ("name", "alias")
+
     def __init__(self, name, alias):
         self.name = name
         self.alias = alias
@@ -12,16 +126,20 @@ class Class(object):
         return "Class(%s, %s)" % (self.name, self.alias)
 
 class Message(object):
+    __slots__ = ("src", "dst", "msgType", "text")
+
     def __init__(self, src, dst, msgType, text):
         self.src = src
         self.dst = dst
         self.msgType = msgType
-        self.text = text
+        self.text = _intern(text)
 
     def __repr__(self):
         return "Message(%s, %s, %s, '%s')" % (self.src, self.dst, self.msgType, self.text)
 
 class DeclareEntity(object):
+    __slots__ = ("entity",)
+
     def __init__(self, entity):
         self.entity = entity
 
@@ -29,6 +147,8 @@ class DeclareEntity(object):
         return "DeclareEntity(%s)" % self.entity
 
 class Sequence(object):
+    __slots__ = ("operations",)
+
     def __init__(self,op=None):
         self.operations = []
         if op is not None:
@@ -38,12 +158,14 @@ class Sequence(object):
         self.operations.extend(op)
 
     def append(self, op):
-        self.operations.apeend(op)
+        self.operations.append(op)
 
     def __repr__(self):
         return "Sequence(%s)" % ", ".join([repr(msg) for msg in self.operations])
 
 class SetActivationState(object):
+    __slots__ = ("entityList", "activationState")
+
     def __init__(self, entityList, activationState):
         self.entityList = entityList
         self.activationState = activationState
@@ -52,6 +174,8 @@ class SetActivationState(object):
         return "SetActivationState(%s, %s)" % (self.entityList, self.activationState)
 
 class Destroy(object):
+    __slots__ = ("entity",)
+
     def __init__(self, entity):
         self.entity = entity
 
@@ -59,6 +183,8 @@ class Destroy(object):
         return "Destroy(%s)" % (self.entity)
 
 class Loop(object):
+    __slots__ = ("condition", "sequence")
+
     def __init__(self, condition, sequence):
         self.condition = unicode(condition)
         self.sequence = sequence
@@ -67,38 +193,48 @@ class Loop(object):
         return "Loop(%s, %s)" % (self.condition, self.sequence)
 
 class Alt(object):
+    __slots__ = ("conditions",)
+
     def __init__(self, condition):
         self.conditions = [condition]
 
     def __repr__(self):
-        return "Alt('%s', %s)" % (self.conditions, self.sequence)
+        return "Alt(%s)" % ", ".join(repr(cond) for cond in self.conditions)
 
 class Else(object):
+    __slots__ = ("condition", "sequence")
+
     def __init__(self, condition, sequence):
-        self.condition = condition
+        self.condition = _intern(condition)
         self.sequence = sequence
 
     def __repr__(self):
         return "Else('%s', %s)" % (self.condition, self.sequence)
 
 class Opt(object):
+    __slots__ = ("condition", "sequence")
+
     def __init__(self, condition, sequence):
-        self.condition = condition
+        self.condition = _intern(condition)
         self.sequence = sequence
 
     def __repr__(self):
         return "Opt('%s', %s)" % (self.condition, self.sequence)
 
 class Note(object):
+    __slots__ = ("position", "entity", "text")
+
     def __init__(self, position, entity, text):
-        self.position = position
+        self.position = _intern(position)
         self.entity = entity
-        self.text = text
+        self.text = _intern(text)
 
     def __repr__(self):
         return "Note('%s', %s, '%s')" % (self.position, self.entity, self.text)
 
 class Wait(object):
+    __slots__ = ("count",)
+
     def __init__(self, count):
         self.count = count
 
@@ -106,6 +242,7 @@ class Wait(object):
         return "Wait(%d)" % self.count
 
 class SegeParser(object):
+    start = "program"
     tokens = [
             "COMMENT",
             "ENTITY",
@@ -132,10 +269,18 @@ class SegeParser(object):
         t.type = self.keywords.get(t.value, "ENTITY")
         return t
 
-    def __init__(self):
+    # fastLexer picks FastLexer over the PLY lexer for parsing
+    def __init__(self, fastLexer=False):
+        self.fastLexer = fastLexer
         self.knownEntities = OrderedDict()
+        self._newEntities = []
+        self.lexer = None
+        self.parser = None
         keywords = self.keywords
         self.keywords = {}
+        # Keep the keyword tokens on the instance so that building more than
+        # one parser doesn't keep growing the class level token list.
+        self.tokens = list(self.tokens)
         for word in keywords:
             lexName = word.upper().replace(" ", "_")
             self.tokens.append(lexName)
@@ -153,48 +298,24 @@ class SegeParser(object):
 
     def t_MESSAGE_TYPE(self, t):
         r"([-~]>|<-)"
-
-        if t.value == "->":
-            t.value = "call"
-        elif t.value == "~>":
-            t.value = "send"
-        elif t.value == "<-":
-            t.value = "respond"
-
+        t.value = MESSAGE_TYPES[t.value]
         return t
 
     def t_STRING(self, t):
         r'"(\\"|[^"])*"({\d+})?'
-        # Take the out the "
-        end = -1
+        # Take the out the " and the {N} auto wrap width
+        end = len(t.value) - 1
         automtrim = 0
         if t.value.endswith("}"):
-            end = t.value.find("{")
-            automtrim = int(t.value[end + 1:-1])
+            end = t.value.rfind("{") - 1
+            automtrim = int(t.value[end + 2:-1])
         txt = t.value[1:end]
 
         txt = txt.replace(r"\t", "\t")
         txt = txt.replace(r"\"", "\"")
         txt = txt.replace(r"\n", "\n")
         if automtrim > 0:
-            i = 0
-            while (i + automtrim) < len(txt):
-                res = txt.find("\n", i, i + automtrim)
-                if res != -1:
-                    i = res + 1
-                    continue
-                j = 0
-                extend = 0
-                while j < 1:
-                    j = txt.rfind(" ", i, i + automtrim + extend)
-                    extend += 1
-                    if (i + automtrim + extend) == len(txt):
-                        j = 0
-                        break
-                if j == 0:
-                    break
-                txt = txt[:j] + "\n" + txt[j+1:]
-                i = j + 2
+            txt = wrapText(txt, automtrim)
 
         t.value = txt
         return t
@@ -209,15 +330,37 @@ class SegeParser(object):
     def getEntity(self, alias):
         if alias not in self.knownEntities:
             self.knownEntities[alias] = Class(alias, alias)
+            self._newEntities.append(self.knownEntities[alias])
 
         return self.knownEntities[alias]
 
+    def p_program(self, p):
+        """
+        program : statement
+                | program statement
+        """
+        # Top level statements are handed out as soon as they are reduced,
+        # see parse() and iterparse(). The ones yacc recovers after a syntax
+        # error are dropped, the parse fails anyway.
+        op = p[len(p) - 1]
+        if op is not None and self.errorLine is None:
+            self._emit(op)
+        p[0] = True
+
     def p_sequence(self, p):
         """
         sequence : statement statement
-                 | sequence statement
         """
-        p[1].extend(p[2].operations)
+        p[0] = Sequence(p[1])
+        if p[2] is not None:
+            p[0].append(p[2])
+
+    def p_sequence_extend(self, p):
+        """
+        sequence : sequence statement
+        """
+        if p[2] is not None:
+            p[1].append(p[2])
         p[0] = p[1]
 
     def p_statement(self, p):
@@ -233,8 +376,8 @@ class SegeParser(object):
                   | declare
                   | wait
         """
-
-        p[0] = Sequence(p[1])
+        # Declarations are None, the entities are declared up front
+        p[0] = p[1]
 
     def p_wait(self, p):
         "wait : WAIT"
@@ -275,16 +418,16 @@ class SegeParser(object):
         p[0] = Opt(p[2], p[3])
 
     def p_block(self, p):
-        """
-        block : BLOCK_OPEN sequence BLOCK_CLOSE
-              | BLOCK_OPEN statement BLOCK_CLOSE
-        """
-
+        "block : BLOCK_OPEN sequence BLOCK_CLOSE"
         p[0] = p[2]
 
+    def p_block_statement(self, p):
+        "block : BLOCK_OPEN statement BLOCK_CLOSE"
+        p[0] = Sequence(p[2])
+
     def p_empty_block(self, p):
         "block : BLOCK_OPEN BLOCK_CLOSE"
-        return Sequence()
+        p[0] = Sequence()
 
 
     def p_message(self, p):
@@ -344,6 +487,14 @@ class SegeParser(object):
             p[0] = Note(p[2], self.getEntity(p[4]), p[5])
 
     def p_error(self, p):
+        if p is None:
+            if self.errorLine is None:
+                self.errorLine = self._lexer.lineno
+            print "Syntax error at end of input"
+            return
+
+        if self.errorLine is None:
+            self.errorLine = p.lineno
         s = self.code.rfind("\n", 0, p.lexpos) + 1
         e = self.code.find("\n", p.lexpos )
         ref = self.code[s:e]
@@ -351,27 +502,203 @@ class SegeParser(object):
         print "%s" % repr(ref)
         print " %s^" % (" " * (p.lexpos - s))
 
+    def _lexsignature(self):
+        strRules = []
+        funcRules = []
+        for name in dir(self):
+            if not name.startswith("t_"):
+                continue
+
+            rule = getattr(self, name)
+            if callable(rule):
+                funcRules.append((rule.__func__.__code__.co_firstlineno,
+                                  name, rule.__doc__))
+            else:
+                strRules.append((name, rule))
+
+        # Function rules are matched in definition order, only keep the order
+        funcRules = [rule[1:] for rule in sorted(funcRules)]
+        return hashlib.md5(repr((self.tokens, strRules,
+                                 funcRules))).hexdigest()
+
+    def _writelextab(self, signature):
+        outputdir = os.path.dirname(os.path.abspath(__file__))
+        try:
+            self.lexer.writetab(LEXTAB, outputdir)
+            with open(os.path.join(outputdir, LEXTAB + ".py"), "a") as f:
+                f.write("_lexsignature = %r\n" % signature)
+            # The stale table is still imported, the next parser would
+            # rebuild it all over again
+            sys.modules.pop(LEXTAB, None)
+        except IOError as e:
+            sys.stderr.write("Couldn't create %r. %s\n" % (LEXTAB, e))
+
     def _buildlexer(self, **kwargs):
+        signature = self._lexsignature()
+        try:
+            lextab = __import__(LEXTAB)
+        except ImportError:
+            lextab = None
+
+        if (getattr(lextab, "_tabversion", None) == lex.__version__ and
+                getattr(lextab, "_lexsignature", None) == signature):
+            self.lexer = lex.lex(module=self, optimize=1, lextab=lextab,
+                                 **kwargs)
+            return
+
+        # The table is missing or the token rules changed, rebuild it
         self.lexer = lex.lex(module=self, **kwargs)
+        self._writelextab(signature)
+
+    def _build(self):
+        # Reflecting the grammar and loading the tables is by far the most
+        # expensive part of a parse so only do it once per parser.
+        if self.parser is None:
+            self._buildlexer()
+            self.parser = yacc.yacc(module=self)
 
     def testLexer(self, data):
-        self._buildlexer()
-        self.lexer.input(data)
+        self._build()
+        lexer = self.lexer.clone()
+        lexer.input(data)
         while True:
-            tok = self.lexer.token()
+            tok = lexer.token()
             if not tok:
                 break
             print tok
 
-    def parse(self, code):
-        self.code = code
-        self._buildlexer()
-        self.parser = yacc.yacc(module=self)
-        res = self.parser.parse(code, lexer=self.lexer)
-        for i, entity in enumerate(self.knownEntities.values()):
-            res.operations.insert(i, DeclareEntity(entity))
+    # Parse code, a string or an iterator of chunks from _readChunks(), and
+    # pass every top level operation to emit. Raises SyntaxError on syntax
+    # errors, even the ones yacc recovered from.
+    def _parse(self, code, emit, profile=None):
+        self.knownEntities = OrderedDict()
+        self._newEntities = []
+        self._emit = emit
+        self.errorLine = None
+        self._build()
+        if self.fastLexer:
+            lexer = FastLexer(self)
+        else:
+            lexer = self.lexer.clone()
+        self._lexer = lexer
+        token = lexer.token
+        if profile is not None:
+            token = profile.timed("lex", token)
+
+        if isinstance(code, basestring):
+            self.code = code
+            result = self.parser.parse(code, lexer=lexer, tokenfunc=token)
+        else:
+            result = self._parseChunks(code, lexer, token)
+
+        if self.errorLine is not None:
+            raise SyntaxError("syntax error on line %d" % self.errorLine)
+        return result
+
+    def _parseChunks(self, code, lexer, token):
+        lexer.input("")
+        def nextToken():
+            while True:
+                tok = token()
+                if tok is not None:
+                    return tok
+
+                chunk = next(code, None)
+                if chunk is None:
+                    return None
+
+                # Line numbers carry on, positions start over with every
+                # chunk and p_error() only needs the current one.
+                self.code = chunk
+                lexer.input(chunk)
+
+        return self.parser.parse(lexer=lexer, tokenfunc=nextToken)
+
+    # profile is an optional segeProfile.Profile to record the parse and
+    # lex times in
+    def parse(self, code, profile=None):
+        start = time.time()
+        res = Sequence()
+        self._parse(code, res.operations.append, profile)
+        res.operations[:0] = [DeclareEntity(entity)
+                              for entity in self.knownEntities.itervalues()]
+        if profile is not None:
+            profile.add("parse", time.time() - start)
         return res
 
+    # Parse source, a string or a file object, on another thread and yield
+    # its top level operations while it is being parsed. Entities are
+    # declared right before the first operation that uses them instead of
+    # all at the start. Files are read in chunks so a long flat sequence is
+    # never held in memory at once. A syntax error is raised as a
+    # SyntaxError once the operations before it have been yielded.
+    #
+    # The parser can't be used for anything else until the generator is
+    # exhausted or closed.
+    def iterparse(self, source, chunkSize=CHUNK_SIZE):
+        chunks = source
+        if not isinstance(source, basestring):
+            chunks = _readChunks(source, chunkSize)
+
+        batches = Queue.Queue(STREAM_QUEUE_SIZE)
+        batch = []
+        abandoned = []
+
+        def flush():
+            if abandoned:
+                raise _Abandoned()
+            for entity in self._newEntities:
+                batch.append(DeclareEntity(entity))
+            del self._newEntities[:]
+            if batch:
+                batches.put((list(batch), None))
+                del batch[:]
+
+        def emit(op):
+            for entity in self._newEntities:
+                batch.append(DeclareEntity(entity))
+            del self._newEntities[:]
+            batch.append(op)
+            if len(batch) >= STREAM_BATCH_SIZE:
+                flush()
+
+        def run():
+            try:
+                try:
+                    self._parse(chunks, emit)
+                except SyntaxError:
+                    # Hand out what was parsed before the error, without
+                    # the entities of the statement it broke off.
+                    del self._newEntities[:]
+                    flush()
+                    raise
+                flush()
+                batches.put((None, None))
+            except _Abandoned:
+                pass
+            except Exception:
+                batches.put((None, sys.exc_info()))
+
+        thread = threading.Thread(target=run)
+        thread.daemon = True
+        thread.start()
+        try:
+            while True:
+                ops, error = batches.get()
+                if ops is None:
+                    break
+                for op in ops:
+                    yield op
+        finally:
+            # Stop the parsing thread the next time it hands out a batch,
+            # making room in case it is waiting for some.
+            abandoned.append(True)
+            while not batches.empty():
+                batches.get_nowait()
+
+        if error is not None:
+            raise error[0], error[1], error[2]
+
 CODE = """activate d
 # First
 activate a activate b
@@ -390,12 +717,12 @@ loop 2 {
 destroy b
 opt "bla bla bla" {
     g->d "A"
-    note over g
+    note over g "over"
     g<-d "B"
-    note left of d
+    note left of d "left"
     alt "gogog" {
         g->d "C"
-        note right of d
+        note right of d "right"
         g<-d "B"
     } else "gogog" {
         g->d "D"
@@ -410,12 +737,158 @@ def _test():
     print "LEXing..."
     parser.testLexer(CODE)
     print "YACCing..."
-    print parser.parse(CODE)
+    res = parser.parse(CODE)
+    print res
+    print "Streaming..."
+    ops = list(parser.iterparse(StringIO(CODE), chunkSize=16))
+    print ops
+    # Same operations, only the entities are declared along the way
+    declared = lambda ops: [op for op in ops if isinstance(op, DeclareEntity)]
+    used = lambda ops: [op for op in ops if not isinstance(op, DeclareEntity)]
+    assert repr(declared(ops)) == repr(declared(res.operations))
+    assert repr(used(ops)) == repr(used(res.operations))
+
+# Token rules in the order PLY tries them: functions in definition order
+# and then strings, longest first.
+_FAST_FUNCTIONS = ("ENTITY", "NUMBER", "COMMENT", "MESSAGE_TYPE", "STRING",
+                   "newline")
+_FAST_STRINGS = ("COMMA", "BLOCK_OPEN", "BLOCK_CLOSE")
+
+
+class _Token(object):
+    # lexer is filled in by yacc on syntax errors
+    __slots__ = ("type", "value", "lineno", "lexpos", "lexer")
 
-def parse(code):
+    def __repr__(self):
+        return "LexToken(%s,%r,%d,%d)" % (self.type, self.value, self.lineno,
+                                          self.lexpos)
+
+
+# Gives the same tokens as the PLY lexer of a SegeParser, with input() and
+# token() like it has, but finds them with one finditer() pass over the
+# input and converts them inline instead of calling a rule per token. The
+# keyword rules never match on their own, ENTITY always comes first.
+class FastLexer(object):
+    _pattern = None
+
+    def __init__(self, parser):
+        self.parser = parser
+        self.lineno = 1
+        self.lexdata = ""
+        self._tokens = iter(())
+        if FastLexer._pattern is None:
+            rules = [(name, getattr(parser, "t_" + name).__doc__)
+                     for name in _FAST_FUNCTIONS]
+            rules.extend((name, re.escape(getattr(parser, "t_" + name)))
+                         for name in _FAST_STRINGS)
+            rules.append(("error", "."))
+            # Ignored characters are skipped as part of the next token, or
+            # of the end of input when nothing follows them. PLY compiles
+            # its rules with re.VERBOSE too.
+            FastLexer._pattern = re.compile(
+                "[%s]*(?:%s|\\Z)" % (re.escape(parser.t_ignore),
+                                     "|".join("(?P<%s>%s)" % rule
+                                              for rule in rules)),
+                re.VERBOSE)
+
+    def input(self, data):
+        self.lexdata = data
+        self._tokens = self._scan(data)
+
+    def token(self):
+        return next(self._tokens, None)
+
+    def _scan(self, data):
+        keywords = self.parser.keywords
+        for match in self._pattern.finditer(data):
+            kind = match.lastgroup
+            if kind is None or kind == "COMMENT":
+                continue
+            if kind == "newline":
+                self.lineno += match.end() - match.start(kind)
+                continue
+
+            tok = _Token()
+            tok.type = kind
+            tok.value = match.group(kind)
+            tok.lineno = self.lineno
+            tok.lexpos = match.start(kind)
+            if kind == "ENTITY":
+                tok.type = keywords.get(tok.value, "ENTITY")
+            elif kind == "STRING":
+                if "\\" in tok.value or tok.value[-1] != '"':
+                    self.parser.t_STRING(tok)
+                else:
+                    # Nothing for t_STRING() to do but drop the quotes
+                    tok.value = tok.value[1:-1]
+            elif kind == "MESSAGE_TYPE":
+                tok.value = MESSAGE_TYPES[tok.value]
+            elif kind == "NUMBER":
+                tok.value = int(tok.value)
+            elif kind == "error":
+                tok.value = data[tok.lexpos:]
+                self.parser.t_error(tok)
+                raise lex.LexError("Illegal character '%s' at index %d" %
+                                   (data[tok.lexpos], tok.lexpos), tok.value)
+
+            yield tok
+
+
+# Check FastLexer against the PLY lexer
+def _testFastLexer():
     parser = SegeParser()
-    return parser.parse(code)
+    parser._build()
+    sources = [CODE,
+               'a->b "x"{3} b<-a "y\\" z" c~>a "multi\nline"{4}\n'
+               '# "quoted" comment\nactivate a, b, c\nwait 3 declare d\n'
+               'note left of a "a \\"quoted\\" word"\n'
+               'alt "x" {\n\ta->b "q"\n} else "y" { }\n',
+               'a->b "x" ! b->a "y"',
+               'a->b "unterminated',
+               "alt\r\n",
+               'a->b "x"\n  ',
+               'a->b "x"\t',
+               " \t "]
+    for code in sources:
+        streams = []
+        for lexer in (parser.lexer.clone(), FastLexer(parser)):
+            lexer.input(code)
+            tokens = []
+            try:
+                while True:
+                    tok = lexer.token()
+                    if tok is None:
+                        break
+                    tokens.append(repr(tok))
+            except Exception as e:
+                tokens.append("%s: %s" % (e.__class__.__name__, e))
+            streams.append(tokens)
+
+        assert streams[0] == streams[1], (code, streams)
+
+    print "FastLexer matches on %d sources" % len(sources)
+
+_local = threading.local()
+
+# The calling thread's parser. A SegeParser (and its yacc parser) keeps the
+# state of the parse in progress, so every thread gets one of its own and
+# parse() can be called from any number of threads at once.
+def getParser():
+    parser = getattr(_local, "parser", None)
+    if parser is None:
+        parser = _local.parser = SegeParser()
+        parser._build()
+
+    return parser
+
+def parse(code, profile=None):
+    return getParser().parse(code, profile)
+
+def iterparse(source, chunkSize=CHUNK_SIZE):
+    # A parser of its own so parse() keeps working while this one streams
+    return SegeParser().iterparse(source, chunkSize)
 
 if __name__ == "__main__":
     _test()
+    _testFastLexer()
 
@@ -0,0 +1,46 @@
+import sys
+import threading
+import time
+
+
+# Wall time and call counts of the compiler phases (parse, lex, layout,
+# render, encode) and of single compiler methods. Times are inclusive, a
+# processSequence call also counts the time of every operation inside it.
+#
+# Pass one to compileOutputs(), SegeParser.parse() or _SegeCompiler() to
+# fill it in, nothing is measured otherwise.
+class Profile(object):
+    def __init__(self):
+        self._lock = threading.Lock()
+        # name -> [calls, seconds]
+        self.entries = {}
+
+    def add(self, name, seconds, calls=1):
+        with self._lock:
+            entry = self.entries.setdefault(name, [0, 0.0])
+            entry[0] += calls
+            entry[1] += seconds
+
+    def timed(self, name, func):
+        def timedFunc(*args, **kwargs):
+            start = time.time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(name, time.time() - start)
+
+        return timedFunc
+
+    # Replace the methods of obj with timed ones, only obj is affected and
+    # not its class.
+    def instrument(self, obj, names):
+        for name in names:
+            setattr(obj, name, self.timed(name, getattr(obj, name)))
+
+    def report(self, out=sys.stdout):
+        print >> out, "%-32s %10s %12s %12s" % ("phase / operation", "calls",
+                                                "total ms", "us/call")
+        entries = sorted(self.entries.items(), key=lambda item: -item[1][1])
+        for name, (calls, seconds) in entries:
+            print >> out, "%-32s %10d %12.2f %12.1f" % (
+                name, calls, seconds * 1000, seconds * 1e6 / calls)
@@ -0,0 +1,232 @@
+#! /usr/bin/env python
+import argparse
+import BaseHTTPServer
+import hashlib
+import multiprocessing
+import Queue
+import SocketServer
+import sys
+import threading
+import time
+import urlparse
+from cStringIO import StringIO
+
+import segeCompiler
+import segeParser
+
+CONTENT_TYPES = {"png": "image/png",
+                 "svg": "image/svg+xml",
+                 "pdf": "application/pdf"}
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, float("inf"))
+
+
+class RenderError(Exception):
+    def __init__(self, status, message):
+        Exception.__init__(self, message)
+        self.status = status
+
+
+def renderCode(parser, code, fmt):
+    try:
+        res = parser.parse(code)
+    except Exception as e:
+        raise RenderError(400, "%s: %s" % (e.__class__.__name__, e))
+
+    out = StringIO()
+    target = segeCompiler._SegeCompiler().compile(res, fmt=fmt, output=out)
+    if fmt == "png":
+        target.write_to_png(out)
+    target.finish()
+    return out.getvalue()
+
+
+class _Job(object):
+    def __init__(self, code, fmt):
+        self.code = code
+        self.fmt = fmt
+        self.done = threading.Event()
+        self.abandoned = False
+        self.result = None
+        self.error = None
+
+
+class _Metrics(object):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.latencySum = 0.0
+        self.latencyCount = 0
+
+    def observe(self, status, seconds):
+        with self._lock:
+            self.requests[status] = self.requests.get(status, 0) + 1
+            self.latencySum += seconds
+            self.latencyCount += 1
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    self.buckets[i] += 1
+                    break
+
+    def format(self, server):
+        lines = []
+        with self._lock:
+            for status, count in sorted(self.requests.items()):
+                lines.append('sege_requests_total{status="%d"} %d' %
+                             (status, count))
+
+            total = 0
+            for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+                total += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append('sege_render_seconds_bucket{le="%s"} %d' %
+                             (le, total))
+
+            lines.append("sege_render_seconds_sum %f" % self.latencySum)
+            lines.append("sege_render_seconds_count %d" % self.latencyCount)
+
+        lines.append("sege_queue_depth %d" % server.jobs.qsize())
+        lines.append("sege_render_cache_hits %d" % server.renders.hits)
+        lines.append("sege_render_cache_misses %d" % server.renders.misses)
+        lines.append("sege_text_metrics_hits %d" %
+                     segeCompiler.textMetrics.hits)
+        lines.append("sege_text_metrics_misses %d" %
+                     segeCompiler.textMetrics.misses)
+        return "\n".join(lines) + "\n"
+
+
+class _RequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if urlparse.urlparse(self.path).path != "/metrics":
+            self.send_error(404)
+            return
+
+        self.reply(200, "text/plain",
+                   self.server.metrics.format(self.server))
+
+    def do_POST(self):
+        url = urlparse.urlparse(self.path)
+        if url.path != "/render":
+            self.send_error(404)
+            return
+
+        start = time.time()
+        fmt = urlparse.parse_qs(url.query).get("format", ["png"])[0]
+        try:
+            if fmt not in CONTENT_TYPES:
+                raise RenderError(400, "Unknown format '%s'" % fmt)
+
+            length = int(self.headers.getheader("Content-Length", 0))
+            data = self.server.render(self.rfile.read(length), fmt)
+        except RenderError as e:
+            self.reply(e.status, "text/plain", "%s\n" % e)
+            status = e.status
+        else:
+            self.reply(200, CONTENT_TYPES[fmt], data)
+            status = 200
+
+        self.server.metrics.observe(status, time.time() - start)
+
+    def reply(self, status, contentType, body):
+        self.send_response(status)
+        self.send_header("Content-Type", contentType)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+# Renders are done by a fixed pool of worker threads, each with its own
+# warm SegeParser since parsers keep per parse state. Requests wait for at
+# most timeout seconds and are turned away when queueSize requests are
+# already waiting.
+class RenderServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, workers=4, queueSize=64, timeout=10.0,
+                 cacheEntries=256):
+        BaseHTTPServer.HTTPServer.__init__(self, address, _RequestHandler)
+        self.jobs = Queue.Queue(queueSize)
+        self.renderTimeout = timeout
+        self.renders = segeCompiler._LRUCache(cacheEntries)
+        self.metrics = _Metrics()
+        for i in range(workers):
+            parser = segeParser.SegeParser()
+            parser._build()
+            worker = threading.Thread(target=self._work, args=(parser,))
+            worker.daemon = True
+            worker.start()
+
+    def _work(self, parser):
+        while True:
+            job = self.jobs.get()
+            if job.abandoned:
+                continue
+
+            try:
+                job.result = renderCode(parser, job.code, job.fmt)
+            except RenderError as e:
+                job.error = e
+            except Exception as e:
+                job.error = RenderError(500, "%s: %s" % (e.__class__.__name__,
+                                                         e))
+            job.done.set()
+
+    def render(self, code, fmt):
+        key = (fmt, hashlib.sha1(code).hexdigest())
+        data = self.renders.get(key)
+        if data is not None:
+            return data
+
+        job = _Job(code, fmt)
+        try:
+            self.jobs.put_nowait(job)
+        except Queue.Full:
+            raise RenderError(503, "Too many pending renders")
+
+        if not job.done.wait(self.renderTimeout):
+            job.abandoned = True
+            raise RenderError(504, "Render timed out")
+
+        if job.error is not None:
+            raise job.error
+
+        self.renders.put(key, job.result)
+        return job.result
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Sequence diagram render '
+                                                 'server.')
+    parser.add_argument('--host', dest="host", default="127.0.0.1",
+                        help='Address to listen on')
+
+    parser.add_argument('--port', dest="port", type=int, default=8080,
+                        help='Port to listen on')
+
+    parser.add_argument('--workers', dest="workers", type=int,
+                        default=multiprocessing.cpu_count(),
+                        help='Render worker threads')
+
+    parser.add_argument('--queue', dest="queue", type=int, default=64,
+                        help='Renders allowed to wait for a worker')
+
+    parser.add_argument('--timeout', dest="timeout", type=float, default=10.0,
+                        help='Seconds a request waits for its render')
+
+    parser.add_argument('--cache-entries', dest="cacheEntries", type=int,
+                        default=256, help='Recent renders kept in memory')
+
+    options = parser.parse_args(argv)
+    server = RenderServer((options.host, options.port), options.workers,
+                          options.queue, options.timeout, options.cacheEntries)
+    print "Serving on http://%s:%d/render" % server.server_address
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main(sys.argv[1:])